@@ -0,0 +1,75 @@
+import sys
+import threading
+import time
+from typing import Optional
+from errors import BudgetError
+
+# Ограничения на одну компиляцию и кооперативная отмена. Горячие циклы Lexer/Parser
+# вызывают tick(): это счётчик, а время и флаг отмены проверяются раз в CHECK_EVERY тиков.
+CHECK_EVERY = 1024
+
+# Уровень вложенности Parser — до FRAMES_PER_LEVEL кадров Python (скобки:
+# expression → operand → addend → unary → multiplier); RESERVED_FRAMES остаётся
+# вызывающему коду (конвейер, сервер, пул потоков)
+FRAMES_PER_LEVEL = 5
+RESERVED_FRAMES = 100
+
+
+def safe_depth() -> int:
+    # Наибольшая вложенность, при которой разбор не упирается в предел рекурсии
+    return max((sys.getrecursionlimit() - RESERVED_FRAMES) // FRAMES_PER_LEVEL, 1)
+
+
+class CancellationToken:
+    def __init__(self):
+        self._event = threading.Event()
+
+    def cancel(self):
+        self._event.set()
+
+    @property
+    def cancelled(self) -> bool:
+        return self._event.is_set()
+
+
+class Budget:
+    def __init__(self, max_source: Optional[int] = None, max_tokens: Optional[int] = None,
+                 max_depth: Optional[int] = None, max_time: Optional[float] = None,
+                 cancel: Optional[CancellationToken] = None):
+        self.max_source = max_source    # символов исходника
+        self.max_tokens = max_tokens    # токенов, включая пробелы и переходы строк
+        self.max_depth = max_depth      # вложенность операторов и выражений
+        self.max_time = max_time        # секунд от начала компиляции
+        self.cancel = cancel
+        self.deadline: Optional[float] = None
+        self.ticks = 0
+
+    def start(self):
+        # Отсчёт времени начинается с первого этапа, повторный вызов его не сбрасывает.
+        # Отмена и истёкший срок проверяются сразу: короткий вход не набирает CHECK_EVERY тиков
+        if self.deadline is None and self.max_time is not None:
+            self.deadline = time.monotonic() + self.max_time
+        self.check(0)
+
+    def tick(self, line: int):
+        self.ticks += 1
+        if self.ticks % CHECK_EVERY == 0:
+            self.check(line)
+
+    def check(self, line: int):
+        if self.cancel is not None and self.cancel.cancelled:
+            raise BudgetError(line, "Компиляция отменена")
+        if self.deadline is not None and time.monotonic() > self.deadline:
+            raise BudgetError(line, f"Превышено время компиляции ({self.max_time} с)")
+
+    def check_source(self, size: int):
+        if self.max_source is not None and size > self.max_source:
+            raise BudgetError(0, f"Размер исходника {size} превышает допустимый ({self.max_source})")
+
+    def check_tokens(self, count: int, line: int):
+        if self.max_tokens is not None and count > self.max_tokens:
+            raise BudgetError(line, f"Превышено допустимое число токенов ({self.max_tokens})")
+
+    def check_depth(self, depth: int, line: int):
+        if self.max_depth is not None and depth > self.max_depth:
+            raise BudgetError(line, f"Превышена допустимая вложенность ({self.max_depth})")
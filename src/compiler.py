@@ -0,0 +1,35 @@
+import os
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, Iterable, List, NamedTuple, Optional
+from budget import Budget
+from pipeline import Pipeline
+from tokens import Token
+
+# Реентерабельный вход в компилятор: всё состояние — в экземплярах Lexer/Parser,
+# на уровне модулей только неизменяемые таблицы (tokens.py), вывода в stdout нет.
+# Поэтому компиляции можно выполнять в потоках: на сборке без GIL (3.13t)
+# они занимают все ядра без сериализации между процессами.
+
+
+class CompileResult(NamedTuple):
+    tokens: List[Token]
+    TI: List[str]
+    TN: List[str]
+    symbols: Dict[str, str]
+    diagnostics: List[Dict[str, Any]]
+
+
+def compile_source(code: str, parse: bool = True, budget: Optional[Budget] = None) -> CompileResult:
+    unit = Pipeline().run(code, ('lex', 'parse') if parse else ('lex',), budget=budget)
+    return CompileResult(unit.tokens, unit.TI, unit.TN, unit.symbols, unit.diagnostics)
+
+
+def compile_many(sources: Iterable[str], workers: Optional[int] = None, parse: bool = True,
+                 limits: Optional[Dict[str, Any]] = None) -> List[CompileResult]:
+    # Результаты в порядке исходников; limits — аргументы Budget, бюджет у каждой компиляции свой,
+    # общий CancellationToken в limits['cancel'] отменяет все сразу
+    def run(code: str) -> CompileResult:
+        return compile_source(code, parse, Budget(**limits) if limits else None)
+
+    with ThreadPoolExecutor(max_workers=workers or os.cpu_count() or 1) as pool:
+        return list(pool.map(run, sources))
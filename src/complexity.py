@@ -0,0 +1,137 @@
+import argparse
+import gc
+import math
+import sys
+import time
+from typing import Callable, Dict, List, NamedTuple, Sequence
+from pipeline import Unit, layout, lex, parse
+
+# Проверка линейности: для каждой оси генерируются программы удваивающегося
+# размера, замеряются этапы, показатель роста — наклон прямой log(время) от log(размер).
+# Линейный этап даёт ~1, квадратичный — ~2; показатель выше MAX_EXPONENT — ошибка.
+
+MAX_EXPONENT = 1.3
+STEPS = 5       # Размеров на ось: base, 2·base, ..., 2^(STEPS-1)·base
+REPEAT = 3      # Из повторов берётся минимум — он меньше всего зашумлён
+MIN_TIME = 0.002  # Этап быстрее на наибольшем размере не проверяется: наклон — шум таймера
+
+
+def identifiers(n: int) -> str:
+    # n разных идентификаторов и чисел: рост таблиц TI и TN
+    lines = [f"v{i}: integer;" for i in range(n)]
+    lines += [f"v{i} = {i + 1}" for i in range(n)]
+    return "\n".join(lines) + "\nend"
+
+
+def expression(n: int) -> str:
+    # Одно выражение из n операций группы сложения
+    terms = " ".join(f"{('plus', 'min')[i % 2]} {i + 1}" for i in range(n))
+    return f"x: integer;\nx = 1 {terms}\nend"
+
+
+def comment(n: int) -> str:
+    # Один комментарий длиной n символов
+    return f"x: integer;\n(* {'ab ' * (n // 3)}*)\nx = 1\nend"
+
+
+def separators(n: int) -> str:
+    # Плотный поток символьных разделителей без пробелов
+    body = ";".join(f"x=({i + 1})" for i in range(n))
+    return f"x: integer;\n{{{body}}}\nend"
+
+
+AXES: Dict[str, Callable[[int], str]] = {
+    'identifiers': identifiers,
+    'expression': expression,
+    'comment': comment,
+    'separators': separators,
+}
+
+# Начальный размер оси: наименьший замер должен занимать миллисекунды, а не микросекунды
+BASE = {
+    'identifiers': 500,
+    'expression': 2000,
+    'comment': 20000,
+    'separators': 500,
+}
+
+
+def _measure(code: str) -> Dict[str, float]:
+    # Этапы замеряются по отдельности на одной единице компиляции
+    unit = Unit(code)
+    times = {}
+    start = time.perf_counter()
+    lex(unit)
+    times['tokenize'] = time.perf_counter() - start
+    start = time.perf_counter()
+    parse(unit)
+    times['parse'] = time.perf_counter() - start
+    start = time.perf_counter()
+    layout(unit)
+    for _ in unit.codes:
+        pass
+    times['report'] = time.perf_counter() - start
+    return times
+
+
+def exponent(sizes: Sequence[int], times: Sequence[float]) -> float:
+    # Наклон регрессии log(время) по log(размер) методом наименьших квадратов
+    xs = [math.log(size) for size in sizes]
+    ys = [math.log(max(t, 1e-9)) for t in times]
+    mean_x = sum(xs) / len(xs)
+    mean_y = sum(ys) / len(ys)
+    num = sum((x - mean_x) * (y - mean_y) for x, y in zip(xs, ys))
+    den = sum((x - mean_x) ** 2 for x in xs)
+    return num / den
+
+
+class Result(NamedTuple):
+    axis: str
+    phase: str
+    sizes: List[int]
+    times: List[float]
+    exponent: float
+
+    @property
+    def ok(self) -> bool:
+        return self.times[-1] < MIN_TIME or self.exponent <= MAX_EXPONENT
+
+
+def check(axes: Sequence[str] = tuple(AXES), steps: int = STEPS, repeat: int = REPEAT) -> List[Result]:
+    results = []
+    for axis in axes:
+        sizes = [BASE[axis] << i for i in range(steps)]
+        timings: Dict[str, List[float]] = {}
+        for size in sizes:
+            code = AXES[axis](size)
+            best: Dict[str, float] = {}
+            gc.disable()
+            try:
+                for _ in range(repeat):
+                    for phase, seconds in _measure(code).items():
+                        best[phase] = min(best.get(phase, seconds), seconds)
+            finally:
+                gc.enable()
+            for phase, seconds in best.items():
+                timings.setdefault(phase, []).append(seconds)
+        for phase, times in timings.items():
+            results.append(Result(axis, phase, sizes, times, exponent(sizes, times)))
+    return results
+
+
+if __name__ == "__main__":
+    args = argparse.ArgumentParser(description="Проверка линейного роста времени этапов компиляции")
+    args.add_argument('--axis', action='append', choices=list(AXES), help="ось (по умолчанию все)")
+    args.add_argument('--steps', type=int, default=STEPS, help="число удвоений размера")
+    args.add_argument('--repeat', type=int, default=REPEAT, help="повторов замера")
+    args.add_argument('--max-exponent', type=float, default=MAX_EXPONENT)
+    options = args.parse_args()
+    MAX_EXPONENT = options.max_exponent
+
+    failed = False
+    for result in check(options.axis or list(AXES), options.steps, options.repeat):
+        ok = result.ok
+        failed = failed or not ok
+        times = " ".join(f"{t * 1000:.1f}" for t in result.times)
+        print(f"{'✅' if ok else '❌'} {result.axis:<12} {result.phase:<9} n^{result.exponent:.2f}  [{times}] мс")
+    sys.exit(1 if failed else 0)
@@ -0,0 +1,178 @@
+from typing import Dict, FrozenSet, List, Optional, Set
+from ir import Assign, Block, Const, Expr, For, If, Input, Output, Program, Stmt, Unary, Var, While
+
+# Выражения как ориентированный ациклический граф: одинаковые поддеревья
+# (операция, узлы-операнды, тип) хранятся одним узлом. Узел — номер в таблицах DAG.
+
+TEMP_PREFIX = '_t'  # Идентификаторы языка начинаются с буквы, поэтому временные не пересекаются с ними
+
+
+class ExprDAG:
+    def __init__(self):
+        self.table: Dict[tuple, int] = {}
+        self.keys: List[tuple] = []
+        self.exprs: List[Expr] = []         # Общий объект ir для узла
+        self.deps: List[FrozenSet[str]] = [] # Переменные, от которых зависит значение узла
+
+    def __len__(self) -> int:
+        return len(self.keys)
+
+    def _add(self, key: tuple, expr: Expr, deps: FrozenSet[str]) -> int:
+        id = self.table.get(key)
+        if id is None:
+            id = self.table[key] = len(self.keys)
+            self.keys.append(key)
+            self.exprs.append(expr)
+            self.deps.append(deps)
+        return id
+
+    def intern(self, expr: Expr) -> int:
+        if isinstance(expr, Var):
+            return self._add(('var', expr.name, expr.type), expr, frozenset((expr.name,)))
+        elif isinstance(expr, Const):
+            return self._add(('const', expr.value, expr.type), expr, frozenset())
+        elif isinstance(expr, Unary):
+            operand = self.intern(expr.operand)
+            shared = expr._replace(operand=self.exprs[operand])
+            return self._add((expr.op, (operand,), expr.type), shared, self.deps[operand])
+        left = self.intern(expr.left)
+        right = self.intern(expr.right)
+        shared = expr._replace(left=self.exprs[left], right=self.exprs[right])
+        return self._add((expr.op, (left, right), expr.type), shared, self.deps[left] | self.deps[right])
+
+    def canonical(self, expr: Expr) -> Expr:
+        # Выражение, в котором одинаковые поддеревья — один и тот же объект
+        return self.exprs[self.intern(expr)]
+
+    def is_leaf(self, id: int) -> bool:
+        return self.keys[id][0] in ('var', 'const')
+
+
+def _assigned(stmt: Stmt) -> Set[str]:
+    names = set()
+    stack = [stmt]
+    while stack:
+        stmt = stack.pop()
+        if isinstance(stmt, Assign):
+            names.add(stmt.name)
+        elif isinstance(stmt, Input):
+            names.update(stmt.names)
+        elif isinstance(stmt, Block):
+            stack.extend(stmt.body)
+        elif isinstance(stmt, If):
+            stack.append(stmt.then)
+            if stmt.orelse is not None:
+                stack.append(stmt.orelse)
+        elif isinstance(stmt, (For, While)):
+            stack.append(stmt.body)
+    return names
+
+
+class CSE:
+    # Устранение общих подвыражений на DAG. Доступные выражения — узлы, значение
+    # которых уже вычислено и не испорчено присваиванием; присваивание переменной
+    # делает недоступными все узлы, зависящие от неё. На слиянии ветвей остаются
+    # выражения, доступные в обеих; в цикле — только не затронутые телом цикла.
+    #
+    # Первый проход находит узлы, повторно вычисляемые при доступности; второй
+    # сохраняет их во временные переменные _t<узел> и подставляет при повторе.
+    def __init__(self, program: Program):
+        self.program = program
+        self.dag = ExprDAG()
+        self.reused: Set[int] = set()
+        self.rewrite = False
+        self.temps: Dict[str, str] = {}
+
+    def run(self) -> Program:
+        self._statements(self.program.body, {})
+        self.rewrite = True
+        body = self._statements(self.program.body, {})
+        symbols = dict(self.program.symbols)
+        symbols.update(self.temps)
+        return Program(tuple(body), symbols, self.program.declared)
+
+    def _kill(self, available: Dict[int, bool], names: Set[str]):
+        for id in [id for id in available if self.dag.deps[id] & names]:
+            del available[id]
+
+    def _statements(self, body, available: Dict[int, bool]) -> List[Stmt]:
+        result = []
+        for stmt in body:
+            result.extend(self._statement(stmt, available))
+        return result
+
+    def _as_statement(self, stmts: List[Stmt], line: int) -> Stmt:
+        return stmts[0] if len(stmts) == 1 else Block(tuple(stmts), line)
+
+    # Возвращает последовательность операторов: присваивания временным и сам оператор
+    def _statement(self, stmt: Stmt, available: Dict[int, bool]) -> List[Stmt]:
+        pre: List[Stmt] = []
+        if isinstance(stmt, Assign):
+            expr = self._expression(stmt.expr, available, pre)
+            self._kill(available, {stmt.name})
+            return pre + [stmt._replace(expr=expr)]
+        elif isinstance(stmt, Input):
+            self._kill(available, set(stmt.names))
+            return [stmt]
+        elif isinstance(stmt, Output):
+            exprs = tuple(self._expression(expr, available, pre) for expr in stmt.exprs)
+            return pre + [stmt._replace(exprs=exprs)]
+        elif isinstance(stmt, Block):
+            return [stmt._replace(body=tuple(self._statements(stmt.body, available)))]
+        elif isinstance(stmt, If):
+            cond = self._expression(stmt.cond, available, pre)
+            then_available = dict(available)
+            then = self._as_statement(self._statement(stmt.then, then_available), stmt.then.line)
+            orelse = None
+            else_available = dict(available)
+            if stmt.orelse is not None:
+                orelse = self._as_statement(self._statement(stmt.orelse, else_available), stmt.orelse.line)
+            available.clear()
+            available.update((id, True) for id in then_available if id in else_available)
+            return pre + [If(cond, then, orelse, stmt.line)]
+        elif isinstance(stmt, For):
+            start, stop, step = (self._expression(expr, available, pre) if expr else None
+                                 for expr in (stmt.start, stmt.stop, stmt.step))
+            self._kill(available, _assigned(stmt.body))
+            body = self._as_statement(self._statement(stmt.body, dict(available)), stmt.body.line)
+            return pre + [For(start, stop, step, body, stmt.line)]
+        # Условие do while вычисляется на каждой итерации: подставляем уже доступные
+        # значения, но новые временные перед циклом не заводим
+        self._kill(available, _assigned(stmt.body))
+        cond = self._expression(stmt.cond, dict(available), None)
+        body = self._as_statement(self._statement(stmt.body, dict(available)), stmt.body.line)
+        return [While(cond, body, stmt.line)]
+
+    def _expression(self, expr: Expr, available: Dict[int, bool], pre: Optional[List[Stmt]]) -> Expr:
+        id = self.dag.intern(expr)
+        if self.dag.is_leaf(id):
+            return self.dag.exprs[id]
+        if id in available:
+            if not self.rewrite:
+                self.reused.add(id)
+                return expr
+            return Var(self._temp(id, expr.type), expr.type, expr.line)
+
+        if isinstance(expr, Unary):
+            rebuilt = expr._replace(operand=self._expression(expr.operand, available, pre))
+        else:
+            left = self._expression(expr.left, available, pre)
+            rebuilt = expr._replace(left=left, right=self._expression(expr.right, available, pre))
+
+        if pre is None:
+            return rebuilt
+        available[id] = True
+        if self.rewrite and id in self.reused:
+            name = self._temp(id, expr.type)
+            pre.append(Assign(name, rebuilt, expr.line))
+            return Var(name, expr.type, expr.line)
+        return rebuilt
+
+    def _temp(self, id: int, type: str) -> str:
+        name = f"{TEMP_PREFIX}{id}"
+        self.temps[name] = type
+        return name
+
+
+def eliminate(program: Program) -> Program:
+    return CSE(program).run()
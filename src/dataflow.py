@@ -0,0 +1,195 @@
+from collections import deque
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+from ir import Assign, Binary, Block, Expr, For, If, Input, Output, Program, Stmt, Unary, Var
+
+# Граф потока управления и анализ потоков данных на битовых множествах:
+# бит i целого числа соответствует i-й объявленной переменной.
+
+WARNING = 'предупреждение'
+
+
+class Node:
+    def __init__(self, id: int, kind: str, line: int, defs: int = 0, uses: int = 0):
+        self.id = id
+        self.kind = kind    # entry, exit, assign, input, output, cond, for_init, for_test
+        self.line = line
+        self.defs = defs
+        self.uses = uses
+        self.succ: List[int] = []
+        self.pred: List[int] = []
+
+
+class CFG:
+    def __init__(self, program: Program):
+        self.symbols = list(program.symbols)
+        self.index = {name: i for i, name in enumerate(self.symbols)}
+        self.nodes: List[Node] = []
+        self.entry = self._node('entry', 0)
+        exits = self._block(program.body, [self.entry])
+        self.exit = self._node('exit', 0)
+        self._link(exits, self.exit)
+
+    def bits(self, names: Iterable[str]) -> int:
+        result = 0
+        for name in names:
+            if name in self.index:
+                result |= 1 << self.index[name]
+        return result
+
+    def names(self, bits: int) -> List[str]:
+        # Обход только установленных битов
+        names = []
+        while bits:
+            low = bits & -bits
+            names.append(self.symbols[low.bit_length() - 1])
+            bits ^= low
+        return names
+
+    def _node(self, kind: str, line: int, defs: int = 0, uses: int = 0) -> int:
+        node = Node(len(self.nodes), kind, line, defs, uses)
+        self.nodes.append(node)
+        return node.id
+
+    def _link(self, preds: List[int], node: int):
+        for pred in preds:
+            self.nodes[pred].succ.append(node)
+            self.nodes[node].pred.append(pred)
+
+    def _uses(self, exprs: Iterable[Optional[Expr]]) -> int:
+        names = []
+        stack = [expr for expr in exprs if expr is not None]
+        while stack:
+            expr = stack.pop()
+            if isinstance(expr, Var):
+                names.append(expr.name)
+            elif isinstance(expr, Unary):
+                stack.append(expr.operand)
+            elif isinstance(expr, Binary):
+                stack.extend((expr.left, expr.right))
+        return self.bits(names)
+
+    def _simple(self, kind: str, line: int, preds: List[int], defs: int = 0, uses: int = 0) -> List[int]:
+        node = self._node(kind, line, defs, uses)
+        self._link(preds, node)
+        return [node]
+
+    def _block(self, body: Iterable[Stmt], preds: List[int]) -> List[int]:
+        for stmt in body:
+            preds = self._statement(stmt, preds)
+        return preds
+
+    # Возвращает узлы, из которых управление уходит к следующему оператору
+    def _statement(self, stmt: Stmt, preds: List[int]) -> List[int]:
+        if isinstance(stmt, Assign):
+            return self._simple('assign', stmt.line, preds, self.bits([stmt.name]), self._uses([stmt.expr]))
+        elif isinstance(stmt, Input):
+            return self._simple('input', stmt.line, preds, defs=self.bits(stmt.names))
+        elif isinstance(stmt, Output):
+            return self._simple('output', stmt.line, preds, uses=self._uses(stmt.exprs))
+        elif isinstance(stmt, Block):
+            return self._block(stmt.body, preds)
+        elif isinstance(stmt, If):
+            cond = self._simple('cond', stmt.line, preds, uses=self._uses([stmt.cond]))
+            exits = self._statement(stmt.then, cond)
+            return exits + (self._statement(stmt.orelse, cond) if stmt.orelse is not None else cond)
+        elif isinstance(stmt, For):
+            # Границы и шаг вычисляются один раз, проверка скрытого счётчика — на каждой итерации
+            init = self._simple('for_init', stmt.line, preds, uses=self._uses([stmt.start, stmt.stop, stmt.step]))
+            test = self._simple('for_test', stmt.line, init)
+            self._link(self._statement(stmt.body, test), test[0])
+            return test
+        cond = self._simple('cond', stmt.line, preds, uses=self._uses([stmt.cond]))
+        self._link(self._statement(stmt.body, cond), cond[0])
+        return cond
+
+
+def order(cfg: CFG, forward: bool = True) -> List[int]:
+    # Обратный порядок обхода в глубину от начала анализа: узел идёт после своих
+    # источников (кроме обратных дуг цикла), и значения проходят граф за один проход,
+    # а не по узлу за проход. Недостижимые узлы — в конце.
+    nodes = cfg.nodes
+    start = cfg.entry if forward else cfg.exit
+    seen = [False] * len(nodes)
+    seen[start] = True
+    post = []
+    stack = [(start, iter(nodes[start].succ if forward else nodes[start].pred))]
+    while stack:
+        id, targets = stack[-1]
+        for target in targets:
+            if not seen[target]:
+                seen[target] = True
+                stack.append((target, iter(nodes[target].succ if forward else nodes[target].pred)))
+                break
+        else:
+            stack.pop()
+            post.append(id)
+    rest = [id for id in range(len(nodes)) if not seen[id]]
+    return post[::-1] + (rest if forward else rest[::-1])
+
+
+def solve(cfg: CFG, transfer: Callable[[Node, int], int], meet: Callable[[int, int], int],
+          boundary: int, init: int, forward: bool = True) -> Tuple[List[int], List[int]]:
+    # Итеративный алгоритм со списком работ; возвращает (IN, OUT) в направлении анализа:
+    # для прямого — на входе и выходе узла, для обратного — на выходе и входе
+    nodes = cfg.nodes
+    start = cfg.entry if forward else cfg.exit
+    before = [init] * len(nodes)
+    after = [init] * len(nodes)
+    before[start] = boundary
+    after[start] = transfer(nodes[start], boundary)
+
+    worklist = deque(id for id in order(cfg, forward) if id != start)
+    queued = [True] * len(nodes)
+    queued[start] = False
+    while worklist:
+        id = worklist.popleft()
+        queued[id] = False
+        node = nodes[id]
+        sources = node.pred if forward else node.succ
+        value = init
+        for source in sources:
+            value = meet(value, after[source])
+        before[id] = value
+        result = transfer(node, value)
+        if result != after[id]:
+            after[id] = result
+            for target in (node.succ if forward else node.pred):
+                if not queued[target] and target != start:
+                    queued[target] = True
+                    worklist.append(target)
+    return before, after
+
+
+def definite_assignment(cfg: CFG) -> List[int]:
+    # Переменные, гарантированно получившие значение на входе в узел (пересечение по путям)
+    full = (1 << len(cfg.symbols)) - 1
+    before, _ = solve(cfg, lambda node, value: value | node.defs, lambda a, b: a & b, 0, full)
+    return before
+
+
+def liveness(cfg: CFG) -> List[int]:
+    # Переменные, значение которых может быть прочитано после выхода из узла
+    live_out, _ = solve(cfg, lambda node, value: node.uses | (value & ~node.defs), lambda a, b: a | b, 0, 0, forward=False)
+    return live_out
+
+
+def warnings(program: Program) -> List[Dict[str, object]]:
+    cfg = CFG(program)
+    assigned = definite_assignment(cfg)
+    live_out = liveness(cfg)
+    result = {}   # (строка, текст) -> None: повтор в одной строке (условие и тело do while) выдаётся один раз
+
+    used = 0
+    for node in cfg.nodes:
+        used |= node.uses
+        for name in cfg.names(node.uses & ~assigned[node.id]):
+            result[node.line, f"Переменная '{name}' может использоваться до присваивания"] = None
+        if node.kind == 'assign':
+            for name in cfg.names(node.defs & ~live_out[node.id]):
+                result[node.line, f"Значение, присвоенное переменной '{name}', нигде не используется"] = None
+
+    for name in cfg.names(~used & ((1 << len(cfg.symbols)) - 1)):
+        result[program.declared.get(name, 0), f"Переменная '{name}' объявлена, но не используется"] = None
+
+    return [{'line': line, 'kind': WARNING, 'message': msg} for line, msg in sorted(result, key=lambda w: w[0])]
+
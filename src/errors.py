@@ -1,7 +1,10 @@
+from typing import Any, Dict
+
 class CompilerError(Exception):
     def __init__(self, line: int, msg: str, kind: str = "") -> None:
         self.line = line
         self.msg = msg
+        self.kind = kind
         prefix = f"{kind}: " if kind else ""
         super().__init__(f"[строка {line}] {prefix}{msg}")
 
@@ -15,4 +18,19 @@ class SyntaxError(CompilerError):
 
 class SemanticError(CompilerError):
     def __init__(self, line: int, msg: str) -> None:
-        super().__init__(line, msg, "семантическая")    
\ No newline at end of file
+        super().__init__(line, msg, "семантическая")    
+
+class ExecutionError(CompilerError):
+    def __init__(self, line: int, msg: str) -> None:
+        super().__init__(line, msg, "выполнения")
+
+class BudgetError(CompilerError):
+    def __init__(self, line: int, msg: str) -> None:
+        super().__init__(line, msg, "превышение ресурсов")
+
+
+def diagnostic(e: Exception) -> Dict[str, Any]:
+    # Ошибка в виде словаря для сервисов и журналов; прочие исключения — без строки и вида
+    if isinstance(e, CompilerError):
+        return {'line': e.line, 'kind': e.kind, 'message': e.msg}
+    return {'line': 0, 'kind': '', 'message': str(e)}
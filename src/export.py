@@ -0,0 +1,152 @@
+import argparse
+import json
+import os
+import sys
+from typing import List, TextIO, Tuple
+from errors import CompilerError
+from lexer import Lexer
+from parser import ParseListener, Parser
+
+# Потоковый экспорт структуры программы на событиях Parser: пишется по мере
+# разбора, дерево не строится. Parser работает по списку токенов, поэтому память —
+# O(числа токенов); сверх него экспортёр держит только стеки открытых операторов и выражений.
+
+STATEMENT_LABELS = {
+    'assignment': 'присваивание',
+    'compound': 'составной',
+    'conditional': 'if',
+    'fixed_loop': 'for',
+    'conditional_loop': 'do while',
+    'input': 'input',
+    'output': 'output',
+}
+
+
+class JsonExporter(ParseListener):
+    # Массив событий JSON: {"event": ..., поля события}
+    def __init__(self, out: TextIO):
+        self.out = out
+        self.first = True
+
+    def _write(self, event: str, **fields):
+        self.out.write('[\n' if self.first else ',\n')
+        self.first = False
+        self.out.write(json.dumps({'event': event, **fields}, ensure_ascii=False))
+
+    def start_program(self):
+        self._write('start_program')
+
+    def end_program(self):
+        self._write('end_program')
+        self.out.write('\n]\n')
+
+    def declaration(self, names: List[str], type: str, line: int):
+        self._write('declaration', names=names, type=type, line=line)
+
+    def start_statement(self, kind: str, line: int):
+        self._write('start_statement', kind=kind, line=line)
+
+    def end_statement(self, kind: str, line: int):
+        self._write('end_statement', kind=kind, line=line)
+
+    def target(self, name: str, type: str, line: int):
+        self._write('target', name=name, type=type, line=line)
+
+    def operand(self, kind: str, value: str, type: str, line: int):
+        self._write('operand', kind=kind, value=value, type=type, line=line)
+
+    def operator(self, op: str, types: Tuple[str, ...], result: str, line: int):
+        self._write('operator', op=op, types=list(types), result=result, line=line)
+
+    def omitted(self, line: int):
+        self._write('omitted', line=line)
+
+
+class DotExporter(ParseListener):
+    # Граф Graphviz: операторы вложены в родительский оператор, выражения
+    # собираются из постфиксного потока операндов и операций
+    def __init__(self, out: TextIO):
+        self.out = out
+        self.next_id = 0
+        self.statements: List[Tuple[int, int]] = []  # (узел, высота стека выражений)
+        self.values: List[int] = []
+
+    def _node(self, label: str, shape: str = 'box') -> int:
+        self.next_id += 1
+        self.out.write(f'  n{self.next_id} [label={json.dumps(label, ensure_ascii=False)}, shape={shape}];\n')
+        return self.next_id
+
+    def _edge(self, parent: int, child: int):
+        self.out.write(f'  n{parent} -> n{child};\n')
+
+    def start_program(self):
+        self.out.write('digraph program {\n')
+        self.statements.append((self._node('программа'), 0))
+
+    def end_program(self):
+        self.statements.pop()
+        self.out.write('}\n')
+
+    def declaration(self, names: List[str], type: str, line: int):
+        node = self._node(f"{', '.join(names)} : {type}\nстрока {line}", 'note')
+        self._edge(self.statements[-1][0], node)
+
+    def start_statement(self, kind: str, line: int):
+        node = self._node(f"{STATEMENT_LABELS[kind]}\nстрока {line}")
+        self._edge(self.statements[-1][0], node)
+        self.statements.append((node, len(self.values)))
+
+    def end_statement(self, kind: str, line: int):
+        node, height = self.statements.pop()
+        for value in self.values[height:]:
+            self._edge(node, value)
+        del self.values[height:]
+
+    def target(self, name: str, type: str, line: int):
+        self._edge(self.statements[-1][0], self._node(f"{name} : {type}", 'house'))
+
+    def operand(self, kind: str, value: str, type: str, line: int):
+        self.values.append(self._node(f"{value} : {type}", 'ellipse'))
+
+    def operator(self, op: str, types: Tuple[str, ...], result: str, line: int):
+        node = self._node(f"{op} : {result}", 'circle')
+        operands = self.values[-len(types):]
+        del self.values[-len(types):]
+        for operand in operands:
+            self._edge(node, operand)
+        self.values.append(node)
+
+
+EXPORTERS = {
+    'json': JsonExporter,
+    'dot': DotExporter,
+}
+
+
+def export(code: str, out: TextIO, format: str = 'json'):
+    Parser(Lexer(code, verbose=False).tokenize(), EXPORTERS[format](out)).parse()
+
+
+if __name__ == "__main__":
+    args = argparse.ArgumentParser(description="Потоковый экспорт структуры программы")
+    args.add_argument('source', help="файл программы")
+    args.add_argument('--format', choices=sorted(EXPORTERS), default='json')
+    args.add_argument('--output', help="файл результата (по умолчанию stdout)")
+    options = args.parse_args()
+    with open(options.source, encoding='utf-8') as f:
+        code = f.read()
+    try:
+        if options.output:
+            # Пишется во временный файл: при ошибке разбора не остаётся обрезанного результата
+            partial = options.output + '.tmp'
+            try:
+                with open(partial, 'w', encoding='utf-8') as out:
+                    export(code, out, options.format)
+            except BaseException:
+                os.remove(partial)
+                raise
+            os.replace(partial, options.output)
+        else:
+            export(code, sys.stdout, options.format)
+    except CompilerError as e:
+        sys.exit(str(e))
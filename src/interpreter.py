@@ -0,0 +1,175 @@
+from typing import Callable, Dict, Iterable, List, Tuple, Union
+from errors import ExecutionError, LexError
+from lexer import parse_number
+from ir import Assign, Block, Const, Expr, For, If, Input, Output, Program, Stmt, Unary, Var, While, wrap
+
+# Построчное выполнение программы для одного набора входных данных. Семантика та же,
+# что у vectorized.py: переменные изначально нулевые; integer — 64-битные целые
+# с переполнением по модулю 2^64; деление на ноль — ошибка выполнения; каждый input
+# берёт следующее входное значение переменной; for (начало; граница; шаг) —
+# скрытый счётчик от начала до границы (не включая), по умолчанию 0, 0, 1.
+
+Value = Union[int, float, bool]
+Reader = Callable[[str, str], object]   # (переменная, тип) -> значение или его запись
+
+MAX_ITERATIONS = 1_000_000
+
+DEFAULTS = {
+    'integer': 0,
+    'real': 0.0,
+    'boolean': False,
+}
+
+RELATIONS = {
+    'NE': lambda a, b: a != b,
+    'EQ': lambda a, b: a == b,
+    'LT': lambda a, b: a < b,
+    'LE': lambda a, b: a <= b,
+    'GT': lambda a, b: a > b,
+    'GE': lambda a, b: a >= b,
+}
+
+ARITHMETIC = {
+    'plus': lambda a, b: a + b,
+    'min': lambda a, b: a - b,
+    'mult': lambda a, b: a * b,
+    'div': lambda a, b: a / b,
+}
+
+
+def convert(value: object, type: str) -> Value:
+    # Входное значение к типу переменной; строки разбираются как запись числа
+    # в программе (с суффиксом основания B/O/D/H), допускается знак
+    if isinstance(value, str):
+        text = value.strip()
+        if type == 'boolean':
+            if text not in ('true', 'false'):
+                raise ValueError(f"Ожидалось true или false, получено '{text}'")
+            return text == 'true'
+        digits = text[1:] if text[:1] in ('+', '-') else text
+        try:
+            value, _ = parse_number(digits)
+        except LexError:
+            raise ValueError(f"Недопустимая запись числа '{text}'") from None
+        if text.startswith('-'):
+            value = -value
+    if type == 'integer':
+        return wrap(int(value))
+    if type == 'real':
+        return float(value)
+    return bool(value)
+
+
+def values(inputs: Dict[str, Iterable[object]]) -> Reader:
+    # Читатель по спискам значений: каждый input берёт следующее значение переменной
+    queues = {name: iter(column) for name, column in inputs.items()}
+
+    def read(name: str, type: str) -> object:
+        try:
+            return next(queues[name])
+        except (KeyError, StopIteration):
+            raise LookupError(f"Нет входного значения для переменной '{name}'") from None
+    return read
+
+
+class Interpreter:
+    def __init__(self, program: Program, read: Reader, max_iterations: int = MAX_ITERATIONS):
+        self.program = program
+        self.reader = read
+        self.max_iterations = max_iterations
+        self.env: Dict[str, Value] = {name: DEFAULTS[type] for name, type in program.symbols.items()}
+        self.outputs: List[Tuple[int, Tuple[Value, ...]]] = []
+
+    def run(self) -> Dict[str, Value]:
+        for stmt in self.program.body:
+            self.execute(stmt)
+        return self.env
+
+    # Точки расширения: профилировщик переопределяет их, обычный запуск не платит за учёт
+    def read(self, stmt: Input, name: str) -> Value:
+        type = self.program.symbols[name]
+        try:
+            return convert(self.reader(name, type), type)
+        except (LookupError, ValueError) as e:
+            raise ExecutionError(stmt.line, str(e)) from None
+
+    def write(self, stmt: Output, values: Tuple[Value, ...]):
+        self.outputs.append((stmt.line, values))
+
+    def iteration(self, stmt: Union[For, While]):
+        pass
+
+    def execute(self, stmt: Stmt):
+        if isinstance(stmt, Assign):
+            self.env[stmt.name] = self.evaluate(stmt.expr)
+        elif isinstance(stmt, Block):
+            for inner in stmt.body:
+                self.execute(inner)
+        elif isinstance(stmt, If):
+            if self.evaluate(stmt.cond):
+                self.execute(stmt.then)
+            elif stmt.orelse is not None:
+                self.execute(stmt.orelse)
+        elif isinstance(stmt, For):
+            self.fixed_loop(stmt)
+        elif isinstance(stmt, While):
+            self.conditional_loop(stmt)
+        elif isinstance(stmt, Input):
+            for name in stmt.names:
+                self.env[name] = self.read(stmt, name)
+        elif isinstance(stmt, Output):
+            self.write(stmt, tuple(self.evaluate(expr) for expr in stmt.exprs))
+
+    def fixed_loop(self, stmt: For):
+        counter = self.evaluate(stmt.start) if stmt.start else 0
+        stop = self.evaluate(stmt.stop) if stmt.stop else 0
+        step = self.evaluate(stmt.step) if stmt.step else 1
+        iterations = 0
+        while (step > 0 and counter < stop) or (step < 0 and counter > stop):
+            iterations += 1
+            if iterations > self.max_iterations:
+                raise ExecutionError(stmt.line, "Превышено допустимое число итераций цикла for")
+            self.iteration(stmt)
+            self.execute(stmt.body)
+            counter = wrap(counter + step)
+
+    def conditional_loop(self, stmt: While):
+        iterations = 0
+        while self.evaluate(stmt.cond):
+            iterations += 1
+            if iterations > self.max_iterations:
+                raise ExecutionError(stmt.line, "Превышено допустимое число итераций цикла do while")
+            self.iteration(stmt)
+            self.execute(stmt.body)
+
+    def evaluate(self, expr: Expr) -> Value:
+        if isinstance(expr, Var):
+            return self.env[expr.name]
+        elif isinstance(expr, Const):
+            return expr.value
+        elif isinstance(expr, Unary):
+            return not self.evaluate(expr.operand)
+
+        left = self.evaluate(expr.left)
+        right = self.evaluate(expr.right)
+        if expr.op in RELATIONS:
+            return RELATIONS[expr.op](left, right)
+        if expr.op in ('or', 'and'):
+            if expr.type == 'integer':
+                return left | right if expr.op == 'or' else left & right
+            result = (bool(left) or bool(right)) if expr.op == 'or' else (bool(left) and bool(right))
+            return convert(result, expr.type)
+        try:
+            if expr.type == 'boolean':
+                # Арифметика над логическими значениями — в целых числах, результат — отличие от нуля
+                return ARITHMETIC[expr.op](int(left), int(right)) != 0
+            result = ARITHMETIC[expr.op](left, right)
+            return wrap(result) if expr.type == 'integer' else result
+        except ZeroDivisionError:
+            raise ExecutionError(expr.line, "Деление на ноль") from None
+
+
+def run(program: Program, inputs: Dict[str, Iterable[object]], max_iterations: int = MAX_ITERATIONS) -> Interpreter:
+    interpreter = Interpreter(program, values(inputs), max_iterations)
+    interpreter.run()
+    return interpreter
@@ -0,0 +1,173 @@
+from typing import Dict, List, NamedTuple, Optional, Tuple, Union
+from tokens import Token
+from parser import ParseListener, Parser
+from lexer import Lexer, parse_number
+
+# Промежуточное представление проверенной программы: выражения и операторы —
+# неизменяемые кортежи, типы приходят в событиях Parser
+
+INT_MIN = -2 ** 63
+
+
+def wrap(value: int) -> int:
+    # Целое к диапазону int64, как при переполнении в numpy: так integer ведёт себя
+    # одинаково в interpreter.py и vectorized.py, включая константы в записи программы
+    return (value - INT_MIN) % 2 ** 64 + INT_MIN
+
+
+class Var(NamedTuple):
+    name: str
+    type: str
+    line: int
+
+class Const(NamedTuple):
+    value: Union[int, float, bool]
+    type: str
+    line: int
+
+class Unary(NamedTuple):
+    op: str
+    operand: 'Expr'
+    type: str
+    line: int
+
+class Binary(NamedTuple):
+    op: str
+    left: 'Expr'
+    right: 'Expr'
+    type: str
+    line: int
+
+Expr = Union[Var, Const, Unary, Binary]
+
+class Assign(NamedTuple):
+    name: str
+    expr: Expr
+    line: int
+
+class Input(NamedTuple):
+    names: Tuple[str, ...]
+    line: int
+
+class Output(NamedTuple):
+    exprs: Tuple[Expr, ...]
+    line: int
+
+class Block(NamedTuple):
+    body: Tuple['Stmt', ...]
+    line: int
+
+class If(NamedTuple):
+    cond: Expr
+    then: 'Stmt'
+    orelse: Optional['Stmt']
+    line: int
+
+class For(NamedTuple):
+    start: Optional[Expr]
+    stop: Optional[Expr]
+    step: Optional[Expr]
+    body: 'Stmt'
+    line: int
+
+class While(NamedTuple):
+    cond: Expr
+    body: 'Stmt'
+    line: int
+
+Stmt = Union[Assign, Input, Output, Block, If, For, While]
+
+class Program(NamedTuple):
+    body: Tuple[Stmt, ...]
+    symbols: Dict[str, str]
+    declared: Dict[str, int]    # строка объявления переменной
+
+
+class Builder(ParseListener):
+    # Собирает дерево из событий Parser: выражения приходят в постфиксном порядке
+    # и собираются на стеке значений, оператор забирает свои выражения и вложенные
+    # операторы по высотам стеков на момент start_statement. Грамматика — только в Parser.
+    def __init__(self):
+        self.symbols: Dict[str, str] = {}
+        self.declared: Dict[str, int] = {}
+        self.values: List[Optional[Expr]] = []
+        self.statements: List[Stmt] = []
+        self.open: List[Tuple[int, int, List[Tuple[str, int]]]] = []  # (высота значений, высота операторов, цели)
+        self.program: Optional[Program] = None
+
+    def start_program(self):
+        self.symbols.clear()
+        self.declared.clear()
+        self.values.clear()
+        self.statements.clear()
+        self.open.clear()
+        self.program = None
+
+    def end_program(self):
+        self.program = Program(tuple(self.statements), dict(self.symbols), dict(self.declared))
+
+    def declaration(self, names: List[str], type: str, line: int):
+        for name in names:
+            self.symbols[name] = type
+            self.declared[name] = line
+
+    def start_statement(self, kind: str, line: int):
+        self.open.append((len(self.values), len(self.statements), []))
+
+    def target(self, name: str, type: str, line: int):
+        self.open[-1][2].append((name, line))
+
+    def operand(self, kind: str, value: str, type: str, line: int):
+        if kind == 'identifier':
+            self.values.append(Var(value, type, line))
+        elif kind == 'number':
+            number, _ = parse_number(value, line)
+            self.values.append(Const(wrap(int(number)) if type == 'integer' else float(number), type, line))
+        else:
+            self.values.append(Const(value == 'true', 'boolean', line))
+
+    def operator(self, op: str, types: Tuple[str, ...], result: str, line: int):
+        if len(types) == 1:
+            self.values.append(Unary(op, self.values.pop(), result, line))
+        else:
+            right = self.values.pop()
+            left = self.values.pop()
+            self.values.append(Binary(op, left, right, result, line))
+
+    def omitted(self, line: int):
+        self.values.append(None)
+
+    def end_statement(self, kind: str, line: int):
+        values_at, statements_at, targets = self.open.pop()
+        exprs = self.values[values_at:]
+        body = self.statements[statements_at:]
+        del self.values[values_at:]
+        del self.statements[statements_at:]
+        if kind == 'assignment':
+            name, target_line = targets[0]
+            stmt = Assign(name, exprs[0], target_line)
+        elif kind == 'input':
+            stmt = Input(tuple(name for name, _ in targets), line)
+        elif kind == 'output':
+            stmt = Output(tuple(exprs), line)
+        elif kind == 'compound':
+            stmt = Block(tuple(body), line)
+        elif kind == 'conditional':
+            stmt = If(exprs[0], body[0], body[1] if len(body) > 1 else None, line)
+        elif kind == 'fixed_loop':
+            stmt = For(exprs[0], exprs[1], exprs[2], body[0], line)
+        else:
+            stmt = While(exprs[0], body[0], line)
+        self.statements.append(stmt)
+
+
+def build(tokens: List[Token]) -> Program:
+    # Разбор проверенного потока токенов с построением дерева
+    builder = Builder()
+    Parser(tokens, builder).parse()
+    return builder.program
+
+
+def compile_program(code: str) -> Program:
+    # Лексика → синтаксис и семантика → дерево за один проход Parser; ошибки — CompilerError
+    return build(Lexer(code, verbose=False).tokenize())
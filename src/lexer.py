@@ -1,23 +1,68 @@
 from tokens import *
 import struct
 from errors import LexError, SyntaxError
-from typing import List
+from typing import Dict, List, Optional, Tuple, Union
+from budget import Budget
+
+def parse_number(raw_value: str, line: int = 0) -> Tuple[Union[int, float], str]:
+    # Значение записи числа (с суффиксом основания B/O/D/H) и её вид для TN: "биты (запись)"
+    clean_raw = raw_value.upper()
+    base = 10
+    is_float = False
+    if clean_raw.endswith('B'):
+        base, clean_raw = 2, clean_raw[:-1]
+    elif clean_raw.endswith('O'):
+        base, clean_raw = 8, clean_raw[:-1]
+    elif clean_raw.endswith('D'):
+        base, clean_raw = 10, clean_raw[:-1]
+    elif clean_raw.endswith('H'):
+        base, clean_raw = 16, clean_raw[:-1]
+    if '.' in clean_raw or 'E' in clean_raw or 'e' in clean_raw:
+        is_float = True
+    
+    try:
+        if is_float:
+            value = float(clean_raw if clean_raw else '0.0') # Переводим str в float
+            packed = struct.pack('f', value) # Упаковываем float в 4 байта
+            bits = ''.join(f'{byte:08b}' for byte in packed) # Преобразуем байты в биты
+            display = f"{bits} ({clean_raw})" # Форматируем вывод
+        else:
+            if clean_raw == '':
+                raise LexError(line, "Пустое значение числа")
+            elif base == 10 and len(clean_raw) > 1 and clean_raw[0] == '0':
+                raise LexError(line, "Недопустимый формат числа")
+            value = int(clean_raw, base)
+            bits = bin(value)[2:] # Преобразуем в биты
+            display = f"{bits} ({clean_raw})" # Форматируем вывод
+    except Exception as e:
+        raise LexError(line, f"Ошибка системы счисления при разборе числа {clean_raw}")
+    return value, display
+
 
 class Lexer:
-    def __init__(self, code: str):
+    def __init__(self, code: str, start_line: int = 1, verbose: bool = True, budget: Optional[Budget] = None):
         self.code = code
+        self.budget = budget
+        self.start_line = start_line # Номер первой строки (для фрагментов большого исходника)
+        self.verbose = verbose       # Вести журнал разбора в self.logs
         self.pos = 0
-        self.line = 1
+        self.line = start_line
         self.col = 1
         self.tokens: List[Token] = []
         self.TI: List[str] = []
         self.TN: List[str] = []
+        self.TI_index: Dict[str, int] = {} # Позиции в TI/TN: проверка «уже в таблице» за O(1)
+        self.TN_index: Dict[str, int] = {}
         self.logs: List[str] = []
 
     def log(self, message: str):
+        if not self.verbose:
+            return
         self.logs.append(f"[строка {self.line}, столбец {self.col}] {message}")
 
     def advance(self, num_chars: int = 1):
+        if self.budget is not None:
+            self.budget.tick(self.line)
         for _ in range(num_chars):
             if self.pos >= len(self.code):
                 return
@@ -66,13 +111,13 @@ class Lexer:
         else:
             self.tokens.append(Token(TokenType.IDENTIFIER, buffer, start_line, start_col))
             self.log(f"IDENTIFIER: {buffer}")
-            if buffer not in self.TI:
+            if buffer not in self.TI_index:
+                self.TI_index[buffer] = len(self.TI)
                 self.TI.append(buffer)
 
     def read_symbolic_separator(self):
-        remaining_code = self.code[self.pos:]
-        for sep in sorted(SYMBOL_SEPARATORS, key=len, reverse=True):
-            if remaining_code.startswith(sep):
+        for sep in SYMBOL_SEPARATORS_LONGEST_FIRST:
+            if self.code.startswith(sep, self.pos):
                 start_line = self.line
                 start_col = self.col
                 self.tokens.append(Token(TokenType.SEPARATOR, sep, start_line, start_col))
@@ -212,38 +257,9 @@ class Lexer:
             else:
                 break
             
-        clean_raw = raw_value.upper()
-        base = 10
-        is_float = False
-        if clean_raw.endswith('B'):
-            base, clean_raw = 2, clean_raw[:-1]
-        elif clean_raw.endswith('O'):
-            base, clean_raw = 8, clean_raw[:-1]
-        elif clean_raw.endswith('D'):
-            base, clean_raw = 10, clean_raw[:-1]
-        elif clean_raw.endswith('H'):
-            base, clean_raw = 16, clean_raw[:-1]
-        if '.' in clean_raw or 'E' in clean_raw or 'e' in clean_raw:
-            is_float = True
-        
-        try:
-            if is_float:
-                value = float(clean_raw if clean_raw else '0.0') # Переводим str в float
-                packed = struct.pack('f', value) # Упаковываем float в 4 байта
-                bits = ''.join(f'{byte:08b}' for byte in packed) # Преобразуем байты в биты
-                display = f"{bits} ({clean_raw})" # Форматируем вывод
-            else:
-                if clean_raw == '':
-                    raise LexError(self.line, "Пустое значение числа")
-                elif base == 10 and len(clean_raw) > 1 and clean_raw[0] == '0':
-                    raise LexError(self.line, "Недопустимый формат числа")
-                value = int(clean_raw, base)
-                bits = bin(value)[2:] # Преобразуем в биты
-                display = f"{bits} ({clean_raw})" # Форматируем вывод
-        except Exception as e:
-            raise LexError(self.line, f"Ошибка системы счисления при разборе числа {clean_raw}")
-        
-        if display not in self.TN:
+        value, display = parse_number(raw_value, self.line)
+        if display not in self.TN_index:
+            self.TN_index[display] = len(self.TN)
             self.TN.append(display)
         self.tokens.append(Token(TokenType.NUMBER, display, start_line, start_col, raw_value))
         self.log(f"NUMBER: {display}")
@@ -264,14 +280,21 @@ class Lexer:
                     
     def tokenize(self):
         self.pos = 0
-        self.line = 1
+        self.line = self.start_line
         self.col = 1
         self.tokens.clear()
         self.TI.clear()
         self.TN.clear()
+        self.TI_index.clear()
+        self.TN_index.clear()
         self.logs.clear()
+        if self.budget is not None:
+            self.budget.start()
+            self.budget.check_source(len(self.code))
         
         while self.pos < len(self.code):
+            if self.budget is not None:
+                self.budget.check_tokens(len(self.tokens), self.line)
             current_char = self.code[self.pos]
             if current_char == '\n':
                 self.tokens.append(Token(TokenType.SEPARATOR, '\n', self.line, self.col))
@@ -292,5 +315,4 @@ class Lexer:
             else:
                 raise LexError(self.line, f"Недопустимый символ '{current_char}'")
         
-        print("\n".join(self.logs))
         return self.tokens
\ No newline at end of file
@@ -1,22 +1,15 @@
 import tkinter as tk
-from tkinter import ttk, filedialog, messagebox
+from tkinter import ttk, filedialog, messagebox, simpledialog
 from tkinter.scrolledtext import ScrolledText
-from typing import List
-from tokens import KEYWORDS, SEPARATORS, Token, TokenType
-from lexer import Lexer
-from parser import Parser
+from typing import List, Optional
+from tokens import KEYWORDS, SEPARATORS
+from pipeline import Pipeline
+from profiler import Profiler
+from xref import XrefIndex, DECLARATION, WRITE
 from errors import *
 
-def _get_token_code(tok: Token, lexer: Lexer) -> int:
-    if tok.type == TokenType.KEYWORD:
-        return KEYWORDS.index(tok.value) + 1
-    elif tok.type == TokenType.SEPARATOR:
-        return SEPARATORS.index(tok.value) + 1
-    elif tok.type == TokenType.IDENTIFIER:
-        return lexer.TI.index(tok.value) + 1
-    elif tok.type == TokenType.NUMBER:
-        return lexer.TN.index(tok.value) + 1
-    return 0
+# Подсветка номеров строк по профилю: от редко к часто выполняемым
+HEAT_COLORS = ["#fff5e6", "#ffe0b3", "#ffc680", "#ffa64d", "#ff7f33"]
 
 def _display_separator(s: str) -> str:
     if s == ' ':
@@ -31,6 +24,10 @@ class App:
         self.root = root
         self.root.title("Компилятор языка 331233")
         self.root.geometry("1366x768")
+        self.xref: Optional[XrefIndex] = None
+        self.profile: Optional[Profiler] = None
+        self.profiled_code = ""
+        self.pipeline = Pipeline()
 
         self._style()
         self._toolbar()
@@ -57,6 +54,11 @@ class App:
 
         ttk.Button(bar, text="Открыть", command=self._open).pack(side="left", padx=4, pady=4)
         ttk.Button(bar, text="Анализ", command=self._analyze).pack(side="left")
+        ttk.Button(bar, text="Выполнить", command=self._run).pack(side="left", padx=4)
+        ttk.Button(bar, text="Сохранить профиль", command=self._save_profile).pack(side="left")
+        ttk.Button(bar, text="Объявление", command=self._goto_declaration).pack(side="left", padx=(12, 0))
+        ttk.Button(bar, text="Использования", command=self._find_usages).pack(side="left", padx=4)
+        ttk.Button(bar, text="Экспорт ссылок", command=self._export_xref).pack(side="left")
 
     def _layout(self):
         self.panes = ttk.Panedwindow(self.root, orient="horizontal")
@@ -121,6 +123,11 @@ class App:
         self.input.bind("<KeyRelease>", self._update_lines)
         self.input.bind("<MouseWheel>", self._sync_scroll)
         self.lines.bind("<MouseWheel>", lambda e: "break")
+        self.input.bind("<F12>", lambda e: self._goto_declaration() or "break")
+        self.input.bind("<Shift-F12>", lambda e: self._find_usages() or "break")
+        self.input.tag_configure("usage", background="#ffe9a8")
+        for i, color in enumerate(HEAT_COLORS):
+            self.lines.tag_configure(f"heat{i}", background=color)
 
         for w in (self.input, self.output):
             w.bind("<Control-c>", lambda e, x=w: self._copy(x))
@@ -159,6 +166,11 @@ class App:
         count = int(self.input.index("end-1c").split(".")[0])
         for i in range(1, count + 1):
             self.lines.insert(tk.END, f"{i}\n")
+        # Профиль показывается, пока текст совпадает с выполненным
+        if self.profile is not None and self.input.get("1.0", tk.END).strip() == self.profiled_code:
+            for line, share in self.profile.heat().items():
+                level = min(int(share * len(HEAT_COLORS)), len(HEAT_COLORS) - 1)
+                self.lines.tag_add(f"heat{level}", f"{line}.0", f"{line}.end")
         self.lines.config(state="disabled")
 
     def _sync_scroll(self, event=None):
@@ -176,8 +188,57 @@ class App:
         except Exception as e:
             messagebox.showerror("Ошибка", str(e))
 
+    def _word_at_cursor(self) -> str:
+        return self.input.get("insert wordstart", "insert wordend").strip()
+
+    def _xref_ready(self) -> bool:
+        if self.xref is None:
+            messagebox.showinfo("Ссылки", "Сначала выполните анализ программы.")
+            return False
+        return True
+
+    def _goto_declaration(self):
+        if not self._xref_ready():
+            return
+        name = self._word_at_cursor()
+        position = self.xref.declaration_of(name)
+        if position is None:
+            messagebox.showinfo("Объявление", f"Объявление '{name}' не найдено.")
+            return
+        line, col = position
+        self.input.mark_set("insert", f"{line}.{col - 1}")
+        self.input.see("insert")
+        self.input.focus_set()
+
+    def _find_usages(self):
+        if not self._xref_ready():
+            return
+        name = self._word_at_cursor()
+        usages = self.xref.usages(name)
+        self.input.tag_remove("usage", "1.0", tk.END)
+        self.output.insert(tk.END, f"\n🔎 Использования '{name}': {len(usages)}\n")
+        for kind, line, col in usages:
+            start = f"{line}.{col - 1}"
+            self.input.tag_add("usage", start, f"{start}+{len(name)}c")
+            label = "объявление" if kind == DECLARATION else "запись" if kind == WRITE else "чтение"
+            self.output.insert(tk.END, f"  [строка {line}, столбец {col}] {label}\n")
+        self.output.see(tk.END)
+
+    def _export_xref(self):
+        if not self._xref_ready():
+            return
+        path = filedialog.asksaveasfilename(defaultextension=".json", filetypes=[("JSON", "*.json")])
+        if not path:
+            return
+        try:
+            self.xref.save(path)
+        except Exception as e:
+            messagebox.showerror("Ошибка", str(e))
+
     def _analyze(self):
         self.output.delete("1.0", tk.END)
+        self.input.tag_remove("usage", "1.0", tk.END)
+        self.xref = None
         for tree in (self.tree_ti, self.tree_tn):
             tree.delete(*tree.get_children())
 
@@ -186,41 +247,79 @@ class App:
             self.output.insert(tk.END, "⚠️ Код пуст.\n")
             return
 
+        stages = ('lex', 'layout', 'parse', 'semantics')
+        xref = lambda unit: XrefIndex(unit.tokens, unit.TI)
+        for stage, unit in self.pipeline.stream(code, stages, verbose=True, listener=xref):
+            if unit.error is not None:
+                self.output.delete("1.0", tk.END)
+                self.output.insert(tk.END, f"❌ Ошибка компиляции:\n{unit.error}\n")
+                return
+            if stage == 'lex':
+                print("\n".join(unit.lexer.logs))
+            elif stage == 'layout':
+                for n, z, tok in unit.codes:
+                    self.output.insert(tk.END, f"({n}, {z}) — {tok.value} [строка {tok.line}]\n")
+                for i, x in enumerate(unit.TI, 1):
+                    self.tree_ti.insert("", "end", values=(i, x))
+                for i, x in enumerate(unit.TN, 1):
+                    self.tree_tn.insert("", "end", values=(i, x))
+            elif stage == 'parse':
+                self.xref = unit.listener
+            elif stage == 'semantics':
+                for warning in unit.warnings:
+                    self.output.insert(tk.END, f"⚠️ [строка {warning['line']}] {warning['message']}\n")
+
+        self.output.insert(tk.END, "\n✅ Успешно: лексика, синтаксис, семантика.\n")
+
+    def _ask_input(self, name: str, type: str) -> str:
+        value = simpledialog.askstring("Ввод", f"{name} ({type}):", parent=self.root)
+        if value is None:
+            raise LookupError(f"Ввод значения '{name}' отменён")
+        return value
+
+    def _run(self):
+        self.output.delete("1.0", tk.END)
+        self.profile = None
+        code = self.input.get("1.0", tk.END).strip()
+        if not code:
+            self.output.insert(tk.END, "⚠️ Код пуст.\n")
+            return
+
+        unit = self.pipeline.run(code, ('lex', 'parse', 'semantics'))
+        if unit.error is not None:
+            self.output.insert(tk.END, f"❌ Ошибка компиляции:\n{unit.error}\n")
+            self._update_lines()
+            return
+
+        profile = Profiler(unit.program, self._ask_input)
         try:
-            lexer = Lexer(code)
-            tokens = lexer.tokenize()
-
-            for tok in tokens:
-                n = {
-                    TokenType.KEYWORD: 1,
-                    TokenType.SEPARATOR: 2,
-                    TokenType.IDENTIFIER: 3,
-                    TokenType.NUMBER: 4
-                }[tok.type]
-                z = _get_token_code(tok, lexer)
-                if not tok.value.isspace():
-                    self.output.insert(
-                        tk.END,
-                        f"({n}, {z}) — {tok.value} [строка {tok.line}]\n"
-                    )
-
-            for i, x in enumerate(lexer.TI, 1):
-                self.tree_ti.insert("", "end", values=(i, x))
-            for i, x in enumerate(lexer.TN, 1):
-                self.tree_tn.insert("", "end", values=(i, x))
-
-            parser = Parser(tokens)
-            parser.parse()
-
-            self.output.insert(tk.END, "\n✅ Успешно: лексика, синтаксис, семантика.\n")
+            profile.run()
+        except CompilerError as e:
+            self.output.insert(tk.END, f"❌ {e}\n")
+        for line, values in profile.outputs:
+            shown = " ".join("true" if v is True else "false" if v is False else str(v) for v in values)
+            self.output.insert(tk.END, f"[строка {line}] {shown}\n")
+
+        self.output.insert(tk.END, f"\n⏱ Выполнено за {profile.elapsed * 1000:.2f} мс\n")
+        for line, (entries, iterations) in sorted(profile.loops.items()):
+            self.output.insert(tk.END, f"  [строка {line}] цикл: входов {entries}, итераций {iterations}\n")
+        for line, (kind, calls, seconds) in sorted(profile.io.items()):
+            self.output.insert(tk.END, f"  [строка {line}] {kind}: {calls} раз, {seconds * 1000:.2f} мс\n")
+        self.profile = profile
+        self.profiled_code = code
+        self._update_lines()
 
+    def _save_profile(self):
+        if self.profile is None:
+            messagebox.showinfo("Профиль", "Сначала выполните программу.")
+            return
+        path = filedialog.asksaveasfilename(defaultextension=".json", filetypes=[("JSON", "*.json")])
+        if not path:
+            return
+        try:
+            self.profile.save(path)
         except Exception as e:
-            self.output.delete("1.0", tk.END)
-
-            self.output.insert(
-                tk.END,
-                f"❌ Ошибка компиляции:\n{e}\n"
-            )
+            messagebox.showerror("Ошибка", str(e))
 
     def _fill_demo(self):
         self.input.insert("1.0", """(* comment *)
@@ -0,0 +1,149 @@
+import argparse
+import os
+import re
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import List, Optional, Tuple
+from errors import LexError
+from lexer import Lexer
+from serialize import dumps, loads
+
+# Меньшие исходники выгоднее разбирать последовательно: запуск пула дороже
+MIN_CHUNK_SIZE = 1 << 20
+
+# Граница фрагмента — начало строки с непробельным символом: к этому месту
+# лексер последовательного прогона гарантированно начинает новую лексему
+_LINE_START = re.compile(r'\n(?=\S)')
+
+
+def comment_spans(code: str) -> List[Tuple[int, int]]:
+    # Границы комментариев (* ... *) так же, как их видит Lexer.read_comment:
+    # вне комментария «(*» всегда открывает комментарий, незакрытый тянется до конца
+    spans = []
+    pos = code.find('(*')
+    while pos != -1:
+        end = code.find('*)', pos + 2)
+        if end == -1:
+            spans.append((pos, len(code)))
+            break
+        spans.append((pos, end + 2))
+        pos = code.find('(*', end + 2)
+    return spans
+
+
+def split_source(code: str, parts: int) -> List[Tuple[int, int, int]]:
+    # Делит исходник на фрагменты (начало, конец, номер первой строки)
+    # по переходам строки вне комментариев
+    spans = comment_spans(code)
+    span_index = 0
+    bounds = [0]
+    step = max(len(code) // max(parts, 1), 1)
+    target = step
+    while target < len(code):
+        match = _LINE_START.search(code, max(target, bounds[-1]))
+        cut = None
+        while match:
+            pos = match.end()
+            while span_index < len(spans) and spans[span_index][1] <= pos:
+                span_index += 1
+            if span_index < len(spans) and spans[span_index][0] < pos:
+                match = _LINE_START.search(code, spans[span_index][1])
+                continue
+            cut = pos
+            break
+        if cut is None:
+            break
+        bounds.append(cut)
+        target = cut + step
+
+    chunks = []
+    line = 1
+    for start, end in zip(bounds, bounds[1:] + [len(code)]):
+        chunks.append((start, end, line))
+        line += code.count('\n', start, end)
+    return chunks
+
+
+def _lex_chunk(args):
+    # Токены возвращаются в бинарном формате serialize: pickle списка Token
+    # воссоздаёт каждый TokenType вызовом класса и стоит дороже самого разбора
+    code, start_line, logs = args
+    lexer = Lexer(code, start_line, logs)
+    try:
+        lexer.tokenize()
+    except LexError as e:
+        # Исключения с позиционными аргументами не переживают pickle — передаём поля
+        return 'error', e.line, e.msg
+    return 'ok', dumps(lexer.tokens, lexer.TI, lexer.TN), lexer.logs, lexer.line, lexer.col
+
+
+def tokenize_parallel(lexer: Lexer, workers: Optional[int] = None, min_chunk_size: int = MIN_CHUNK_SIZE,
+                      logs: bool = False):
+    # Результат (tokens, TI, TN) совпадает с последовательным lexer.tokenize();
+    # журнал разбора собирается только при logs=True и lexer.verbose.
+    # С бюджетом разбор последовательный: отмена через threading.Event не передаётся
+    # в процессы, а число токенов и время проверяются только по всему исходнику
+    code = lexer.code
+    workers = workers or os.cpu_count() or 1
+    parts = min(workers, len(code) // max(min_chunk_size, 1))
+    if parts < 2 or lexer.start_line != 1 or lexer.budget is not None:
+        return lexer.tokenize()
+
+    chunks = split_source(code, parts)
+    if len(chunks) < 2:
+        return lexer.tokenize()
+
+    lexer.pos = 0
+    lexer.line = 1
+    lexer.col = 1
+    lexer.tokens.clear()
+    lexer.TI.clear()
+    lexer.TN.clear()
+    lexer.TI_index.clear()
+    lexer.TN_index.clear()
+    lexer.logs.clear()
+
+    jobs = [(code[start:end], line, logs and lexer.verbose) for start, end, line in chunks]
+    with ProcessPoolExecutor(max_workers=min(workers, len(chunks))) as pool:
+        for result in pool.map(_lex_chunk, jobs):
+            if result[0] == 'error':
+                _, line, msg = result
+                raise LexError(line, msg)
+            _, data, chunk_logs, line, col = result
+            stream = loads(data)
+            lexer.tokens.extend(stream.tokens())
+            lexer.logs.extend(chunk_logs)
+            # Перенумерация TI/TN: порядок первого вхождения по всему исходнику
+            for name in stream.TI:
+                if name not in lexer.TI_index:
+                    lexer.TI_index[name] = len(lexer.TI)
+                    lexer.TI.append(name)
+            for num in stream.TN:
+                if num not in lexer.TN_index:
+                    lexer.TN_index[num] = len(lexer.TN)
+                    lexer.TN.append(num)
+            lexer.line, lexer.col = line, col
+
+    lexer.pos = len(code)
+    return lexer.tokens
+
+
+if __name__ == "__main__":
+    # Замер ускорения: последовательный разбор против пула с разным числом процессов
+    args = argparse.ArgumentParser(description="Сравнение последовательного и параллельного лексического анализа")
+    args.add_argument('source', help="файл программы")
+    args.add_argument('--workers', type=int, action='append', help="число процессов (можно несколько раз)")
+    options = args.parse_args()
+    with open(options.source, encoding='utf-8') as f:
+        code = f.read()
+
+    start = time.perf_counter()
+    expected = Lexer(code, verbose=False).tokenize()
+    sequential = time.perf_counter() - start
+    print(f"последовательно: {sequential:.3f} с, токенов {len(expected)}")
+    for workers in options.workers or [os.cpu_count() or 1]:
+        start = time.perf_counter()
+        tokens = tokenize_parallel(Lexer(code, verbose=False), workers, min_chunk_size=1)
+        elapsed = time.perf_counter() - start
+        same = "совпадает" if tokens == expected else "НЕ совпадает"
+        print(f"процессов {workers}: {elapsed:.3f} с, ускорение ×{sequential / elapsed:.2f}, результат {same}")
@@ -1,6 +1,7 @@
-from typing import Dict, List, Optional
+from typing import Dict, List, Optional, Tuple
 from tokens import Token, TokenType
-from errors import SyntaxError, SemanticError
+from errors import BudgetError, SyntaxError, SemanticError
+from budget import Budget
 
 class Context:
     def __init__(self):
@@ -27,23 +28,24 @@ class Context:
         return current_token
     
     def skip_layout(self):
-        while self.current() and self.current().value in [' ', '\n']:
-            self.pos += 1
-        if self.current() and self.current().value == '(*':
+        while True:
+            while self.current() and self.current().value in [' ', '\n']:
+                self.pos += 1
+            if not (self.current() and self.current().value == '(*'):
+                return
             while self.current() and self.current().value != '*)':
                 self.pos += 1
             if self.current() and self.current().value == '*)':
                 self.pos += 1
-            self.skip_layout()
     
     def declare_symbol(self, name: str, type: str):
         if name in self.symbols:
             raise SemanticError(0, f"Переменная '{name}' уже объявлена")
         self.symbols[name] = type
 
-    def get_type(self, name: str):
+    def get_type(self, name: str, line: int = 0):
         if name not in self.symbols:
-            raise SemanticError(0, f"Переменная '{name}' не объявлена")
+            raise SemanticError(line, f"Переменная '{name}' не объявлена")
         return self.symbols[name]
     
     def peek_non_layout(self, start_offset=0):
@@ -52,16 +54,92 @@ class Context:
             i += 1
         return self.tokens[i] if i < len(self.tokens) else None
     
+class ParseListener:
+    # Получатель событий разбора (в духе SAX): Parser вызывает методы по мере
+    # распознавания конструкций и не строит дерево. Выражения приходят в
+    # постфиксном порядке: операнды, затем операция над ними.
+    def start_program(self): pass
+    def end_program(self): pass
+    def declaration(self, names: List[str], type: str, line: int): pass
+    def start_statement(self, kind: str, line: int): pass
+    def end_statement(self, kind: str, line: int): pass
+    def target(self, name: str, type: str, line: int): pass
+    def operand(self, kind: str, value: str, type: str, line: int): pass
+    def operator(self, op: str, types: Tuple[str, ...], result: str, line: int): pass
+    def omitted(self, line: int): pass  # Пропущенное выражение заголовка for
+
+class Listeners(ParseListener):
+    # Рассылка событий нескольким получателям за один проход Parser
+    def __init__(self, *listeners: ParseListener):
+        self.listeners = listeners
+
+    def start_program(self):
+        for listener in self.listeners:
+            listener.start_program()
+
+    def end_program(self):
+        for listener in self.listeners:
+            listener.end_program()
+
+    def declaration(self, names: List[str], type: str, line: int):
+        for listener in self.listeners:
+            listener.declaration(names, type, line)
+
+    def start_statement(self, kind: str, line: int):
+        for listener in self.listeners:
+            listener.start_statement(kind, line)
+
+    def end_statement(self, kind: str, line: int):
+        for listener in self.listeners:
+            listener.end_statement(kind, line)
+
+    def target(self, name: str, type: str, line: int):
+        for listener in self.listeners:
+            listener.target(name, type, line)
+
+    def operand(self, kind: str, value: str, type: str, line: int):
+        for listener in self.listeners:
+            listener.operand(kind, value, type, line)
+
+    def operator(self, op: str, types: Tuple[str, ...], result: str, line: int):
+        for listener in self.listeners:
+            listener.operator(op, types, result, line)
+
+    def omitted(self, line: int):
+        for listener in self.listeners:
+            listener.omitted(line)
+
 class Parser:
-    def __init__(self, tokens: List[Token]):
+    def __init__(self, tokens: List[Token], listener: Optional[ParseListener] = None, budget: Optional[Budget] = None):
         self.ctx = Context()
         self.ctx.tokens = tokens
         self.ctx.pos = 0
+        self.listener = listener or ParseListener()
+        self.budget = budget
+        self.depth = 0
+
+    # Вложенность операторов и выражений; при ошибке разбор прерывается, поэтому
+    # уменьшение глубины в конце метода не требует finally
+    def enter(self):
+        self.depth += 1
+        if self.budget is not None:
+            self.budget.check_depth(self.depth, self.line())
+            self.tick()
+
+    def line(self) -> int:
+        token = self.ctx.current()
+        return token.line if token else 0
+
+    def tick(self):
+        if self.budget is not None:
+            self.budget.tick(self.line())
 
     # <программа>::={/ (<описание> | <оператор>) ( : | переход строки) /} end
     def program(self):
+        self.listener.start_program()
         self.ctx.skip_layout()
         while self.ctx.current() and self.ctx.current().value != 'end':
+            self.tick()
 
             if self.ctx.current().value == '(*':
                 start_token = self.ctx.current()
@@ -80,6 +158,7 @@ class Parser:
             self.ctx.skip_layout()
 
         self.ctx.consume(TokenType.KEYWORD.value, 'end')
+        self.listener.end_program()
 
     def is_declaration(self):
         token0, token1 = self.ctx.peek_non_layout(), self.ctx.peek_non_layout(1)
@@ -90,6 +169,7 @@ class Parser:
     def declaration(self):
         names = [self.ctx.consume(TokenType.IDENTIFIER.value).value]
         while self.ctx.current() and self.ctx.current().value == ',':
+            self.tick()
             self.ctx.skip_layout()
             self.ctx.consume(TokenType.SEPARATOR.value, ',')
             self.ctx.skip_layout()
@@ -103,9 +183,11 @@ class Parser:
         for name in names:
             self.ctx.declare_symbol(name, token.value)
         self.ctx.consume(TokenType.SEPARATOR.value, ';')
+        self.listener.declaration(names, token.value, token.line)
 
     #<оператор>::= <составной> | <присваивания> | <условный> | <фиксированного_цикла> | <условного_цикла> | <ввода> | <вывода>
     def operator(self):
+        self.enter()
         self.ctx.skip_layout()
         token = self.ctx.current()
         if not token:
@@ -126,10 +208,12 @@ class Parser:
             self.output_op()
         else:
             raise SyntaxError(token.line, f"Неожиданный токен '{token.value}'")
+        self.depth -= 1
 
     # <составной>::= «{» <оператор> { ; <оператор> } «}»
     def compound(self):
-        self.ctx.consume(TokenType.SEPARATOR.value, '{')
+        start = self.ctx.consume(TokenType.SEPARATOR.value, '{')
+        self.listener.start_statement('compound', start.line)
         self.ctx.skip_layout()
         self.operator()
         while self.ctx.current() and self.ctx.current().value == ';':
@@ -138,10 +222,12 @@ class Parser:
             self.operator()
         self.ctx.skip_layout()
         self.ctx.consume(TokenType.SEPARATOR.value, '}')
+        self.listener.end_statement('compound', start.line)
 
     # <условный>::= if <выражение> then <оператор> [else <оператор>] end_else
     def conditional(self):
-        self.ctx.consume(TokenType.KEYWORD.value, 'if')
+        start = self.ctx.consume(TokenType.KEYWORD.value, 'if')
+        self.listener.start_statement('conditional', start.line)
         self.ctx.skip_layout()
         cond = self.expression()
         if cond['type'] != 'boolean':
@@ -155,10 +241,12 @@ class Parser:
             self.operator()
         self.ctx.skip_layout()
         self.ctx.consume(TokenType.KEYWORD.value, 'end_else')
+        self.listener.end_statement('conditional', start.line)
 
     # <фиксированного_цикла>::= for «(» [<выражение>] ; [<выражение>] ; [<выражение>] «)» <оператор>
     def fixed_loop(self):
-        self.ctx.consume(TokenType.KEYWORD.value, 'for')
+        start = self.ctx.consume(TokenType.KEYWORD.value, 'for')
+        self.listener.start_statement('fixed_loop', start.line)
         self.ctx.skip_layout()
         self.ctx.consume(TokenType.SEPARATOR.value, '(')
         if self.ctx.current() and self.ctx.current().value != ';':
@@ -167,6 +255,8 @@ class Parser:
             if expr['type'] != 'integer':
                 raise SemanticError(self.ctx.current().line, f"Параметры for должны быть целочисленными, получен тип '{expr['type']}'")
             self.ctx.skip_layout()
+        else:
+            self.listener.omitted(self.line())
         self.ctx.consume(TokenType.SEPARATOR.value, ';')
         if self.ctx.current() and self.ctx.current().value != ';':
             self.ctx.skip_layout()
@@ -174,6 +264,8 @@ class Parser:
             if expr['type'] != 'integer':
                 raise SemanticError(self.ctx.current().line, f"Параметры for должны быть целочисленными, получен тип '{expr['type']}'")
             self.ctx.skip_layout()
+        else:
+            self.listener.omitted(self.line())
         self.ctx.consume(TokenType.SEPARATOR.value, ';')
         if self.ctx.current() and self.ctx.current().value != ')':
             self.ctx.skip_layout()
@@ -181,12 +273,16 @@ class Parser:
             if expr['type'] != 'integer':
                 raise SemanticError(self.ctx.current().line, f"Параметры for должны быть целочисленными, получен тип '{expr['type']}'")
             self.ctx.skip_layout()
+        else:
+            self.listener.omitted(self.line())
         self.ctx.consume(TokenType.SEPARATOR.value, ')')
         self.operator()
+        self.listener.end_statement('fixed_loop', start.line)
 
     # <условного_цикла>::= do while <выражение> <оператор> loop
     def conditional_loop(self):
-        self.ctx.consume(TokenType.KEYWORD.value, 'do')
+        start = self.ctx.consume(TokenType.KEYWORD.value, 'do')
+        self.listener.start_statement('conditional_loop', start.line)
         self.ctx.skip_layout()
         self.ctx.consume(TokenType.KEYWORD.value, 'while')
         self.ctx.skip_layout()
@@ -196,43 +292,55 @@ class Parser:
         self.operator()
         self.ctx.skip_layout()
         self.ctx.consume(TokenType.KEYWORD.value, 'loop')
+        self.listener.end_statement('conditional_loop', start.line)
 
     # <ввода>::= input «(»<идентификатор> {пробел <идентификатор>}«)»
     def input_op(self):
-        self.ctx.consume(TokenType.KEYWORD.value, 'input')
+        start = self.ctx.consume(TokenType.KEYWORD.value, 'input')
+        self.listener.start_statement('input', start.line)
         self.ctx.consume(TokenType.SEPARATOR.value, '(')
-        self.ctx.consume(TokenType.IDENTIFIER.value)
+        name = self.ctx.consume(TokenType.IDENTIFIER.value)
+        self.listener.target(name.value, self.ctx.get_type(name.value, name.line), name.line)
         while self.ctx.current() and self.ctx.current().value == ' ':
             self.ctx.consume(TokenType.SEPARATOR.value, ' ', skip=False)
-            self.ctx.consume(TokenType.IDENTIFIER.value)
+            name = self.ctx.consume(TokenType.IDENTIFIER.value)
+            self.listener.target(name.value, self.ctx.get_type(name.value, name.line), name.line)
         self.ctx.consume(TokenType.SEPARATOR.value, ')')
+        self.listener.end_statement('input', start.line)
 
     # <вывода>::= output «(»<выражение> { пробел <выражение> }«)»
     def output_op(self):
-        self.ctx.consume(TokenType.KEYWORD.value, 'output')
+        start = self.ctx.consume(TokenType.KEYWORD.value, 'output')
+        self.listener.start_statement('output', start.line)
         self.ctx.consume(TokenType.SEPARATOR.value, '(')
         self.expression()
         while self.ctx.current() and self.ctx.current().value == ' ':
             self.ctx.consume(TokenType.SEPARATOR.value, ' ')
             self.expression()
         self.ctx.consume(TokenType.SEPARATOR.value, ')')
+        self.listener.end_statement('output', start.line)
 
     # <присваивания> ::= [ let ] <идентификатор> = <выражение>
     def assignment(self):
+        start = self.ctx.current()
+        self.listener.start_statement('assignment', start.line)
         if self.ctx.current().value == 'let':
             self.ctx.consume(TokenType.KEYWORD.value, 'let')
         self.ctx.skip_layout()
         name = self.ctx.consume(TokenType.IDENTIFIER.value)
+        var_type = self.ctx.get_type(name.value, name.line)
+        self.listener.target(name.value, var_type, name.line)
         self.ctx.skip_layout()
         self.ctx.consume(TokenType.SEPARATOR.value, '=')
         self.ctx.skip_layout()
         expr_type = self.expression()
-        var_type = self.ctx.get_type(name.value)
         if var_type != expr_type['type']:
             raise SemanticError(name.line, f"Несовпадение типов в присваивании: '{var_type}' и '{expr_type['type']}'")
+        self.listener.end_statement('assignment', start.line)
 
     # <выражение>::= <операнд>{<операции_группы_отношения> <операнд>}
     def expression(self):
+        self.enter()
         left = self.operand()
         self.ctx.skip_layout()
         while self.ctx.current() and self.ctx.current().value in ['NE', 'EQ', 'LT', 'LE', 'GT', 'GE']:
@@ -243,7 +351,9 @@ class Parser:
                 raise SemanticError(op.line, f"Несовпадение типов в операции отношения: '{left['type']}' и '{right['type']}'")
             elif left['type'] not in ('integer', 'real', 'boolean'):
                 raise SemanticError(op.line, f"Сравнение несравнимых типов: '{left['type']}'")
-            left = {'type': 'boolean', 'value': f"{left['value']} {op.value} {right['value']}"}  
+            self.listener.operator(op.value, (left['type'], right['type']), 'boolean', op.line)
+            left = {'type': 'boolean'}
+        self.depth -= 1
         return left
     
     # <операнд>::= <слагаемое> {<операции_группы_сложения> <слагаемое>}
@@ -256,7 +366,8 @@ class Parser:
             right = self.addend()
             if left['type'] != right['type']:
                 raise SemanticError(op.line, f"Несовпадение типов в операции сложения: '{left['type']}' и '{right['type']}'")
-            left = {'type': left['type'], 'value': f"{left['value']} {op.value} {right['value']}"}  
+            self.listener.operator(op.value, (left['type'], right['type']), left['type'], op.line)
+            left = {'type': left['type']}
         return left
 
     # <слагаемое>::= <множитель> {<операции_группы_умножения><множитель>}
@@ -271,17 +382,21 @@ class Parser:
                 raise SemanticError(op.line, f"Несовпадение типов в операции умножения: '{left['type']}' и '{right['type']}'")
             if op.value == 'div' and (left['type'] == 'integer' and right['type'] == 'integer'):
                 raise SemanticError(op.line, "Операция 'div' недопустима для integer")
-            left = {'type': left['type'], 'value': f"{left['value']} {op.value} {right['value']}"}
+            self.listener.operator(op.value, (left['type'], right['type']), left['type'], op.line)
+            left = {'type': left['type']}
         return left
     
     # <унарная_операция>::= ~
     def unary(self):
         if self.ctx.current().value == '~':
             op = self.ctx.consume(TokenType.SEPARATOR.value, '~')
+            self.enter()
             operand = self.unary()
+            self.depth -= 1
             if operand['type'] != 'boolean':
                 raise SemanticError(op.line, f"Несовпадение типов в унарной операции: '{operand['type']}'")
-            return {'type': 'boolean', 'value': f"~{operand['value']}"}
+            self.listener.operator('~', (operand['type'],), 'boolean', op.line)
+            return {'type': 'boolean'}
         return self.multiplier()
     
     # <множитель>::= <идентификатор> | <число> | <логическая_константа> | <унарная_операция> <множитель> | « (»<выражение>«)»
@@ -291,18 +406,22 @@ class Parser:
             raise SyntaxError("Неожиданный конец файла")
         if token.type == TokenType.IDENTIFIER.value:
             name = self.ctx.consume(TokenType.IDENTIFIER.value).value
-            var_type = self.ctx.get_type(name)
-            return {'type': var_type, 'value': name}
+            var_type = self.ctx.get_type(name, token.line)
+            self.listener.operand('identifier', name, var_type, token.line)
+            return {'type': var_type}
         elif token.type == TokenType.NUMBER.value:
             value = self.ctx.consume(TokenType.NUMBER.value).value
             raw = token.raw_value
             if '.' in value:
-                return {'type': 'real', 'value': raw}
+                self.listener.operand('number', raw, 'real', token.line)
+                return {'type': 'real'}
             else:
-                return {'type': 'integer', 'value': raw}
+                self.listener.operand('number', raw, 'integer', token.line)
+                return {'type': 'integer'}
         elif token.type == TokenType.KEYWORD.value and token.value in ['true', 'false']:
             value = self.ctx.consume(TokenType.KEYWORD.value).value
-            return {'type': 'boolean', 'value': value}
+            self.listener.operand('boolean', value, 'boolean', token.line)
+            return {'type': 'boolean'}
         elif token.value == '(':
             self.ctx.consume(TokenType.SEPARATOR.value, '(')
             expr = self.expression()
@@ -312,4 +431,10 @@ class Parser:
             raise SyntaxError(token.line, f"Неожиданный токен '{token.value}'")
     
     def parse(self):
-        self.program()
\ No newline at end of file
+        if self.budget is not None:
+            self.budget.start()
+        try:
+            self.program()
+        except RecursionError:
+            # Вложенность без ограничения в Budget всё равно не должна ронять процесс
+            raise BudgetError(self.line(), "Превышена допустимая вложенность (предел рекурсии)") from None
\ No newline at end of file
@@ -0,0 +1,242 @@
+import argparse
+import hashlib
+import time
+from typing import Any, Callable, Dict, Iterable, Iterator, List, NamedTuple, Optional, Tuple
+from errors import BudgetError, diagnostic
+from lexer import Lexer
+from parser import Listeners, ParseListener, Parser
+from serialize import TYPE_CODES, dumps, token_code
+from tokens import Token
+import dag
+import dataflow
+import ir
+
+# Этапы компиляции как конвейер: каждый этап читает и дополняет общую единицу
+# компиляции (Unit). Этапы выбираются на каждый запуск, недостающие предшественники
+# добавляются автоматически: для подсветки достаточно ('lex',), разбор не запускается.
+# Хуки before/after вызываются вокруг каждого этапа; before может вернуть True,
+# чтобы этап был пропущен (например, результат взят из кэша).
+
+
+class Unit:
+    def __init__(self, code: str, **options):
+        self.code = code
+        self.options = options                  # budget, listener, verbose
+        self.listener: Optional[ParseListener] = None
+        self.lexer: Optional[Lexer] = None
+        self.tokens: List[Token] = []
+        self.TI: List[str] = []
+        self.TN: List[str] = []
+        self.codes: Iterable[Tuple[int, int, Token]] = ()
+        self.symbols: Dict[str, str] = {}
+        self.program: Optional[ir.Program] = None
+        self.warnings: List[Dict[str, Any]] = []
+        self.output: Optional[bytes] = None
+        self.diagnostics: List[Dict[str, Any]] = []
+        self.error: Optional[Exception] = None
+
+
+class Stage(NamedTuple):
+    name: str
+    run: Callable[[Unit], None]
+    requires: Tuple[str, ...]
+    provides: Tuple[str, ...]
+
+
+def lex(unit: Unit):
+    unit.lexer = Lexer(unit.code, verbose=unit.options.get('verbose', False), budget=unit.options.get('budget'))
+    try:
+        unit.lexer.tokenize()
+    finally:
+        # При LexError остаются токены до ошибки — клиенты сервиса и watch их показывают
+        unit.tokens = unit.lexer.tokens
+        unit.TI = unit.lexer.TI
+        unit.TN = unit.lexer.TN
+
+
+def layout(unit: Unit):
+    # Ленивый поток (n, z, токен) без пробелов и переходов строк — для таблицы кодов и подсветки
+    ti_codes = {name: i for i, name in enumerate(unit.TI, 1)}
+    tn_codes = {num: i for i, num in enumerate(unit.TN, 1)}
+    unit.codes = (
+        (TYPE_CODES[tok.type], token_code(tok, ti_codes, tn_codes), tok)
+        for tok in unit.tokens if not tok.value.isspace()
+    )
+
+
+def parse(unit: Unit):
+    # Синтаксис и семантика объявлений/типов проверяются Parser за один проход,
+    # в том же проходе события собираются в дерево ir
+    listener = unit.options.get('listener')
+    if listener is not None and not isinstance(listener, ParseListener):
+        listener = listener(unit)  # Фабрика: слушателю нужны результаты лексического анализа
+    unit.listener = listener
+    builder = ir.Builder()
+    parser = Parser(unit.tokens, Listeners(builder, listener) if listener else builder, unit.options.get('budget'))
+    unit.symbols = parser.ctx.symbols
+    parser.parse()
+    unit.program = builder.program
+
+
+def semantics(unit: Unit):
+    unit.warnings = dataflow.warnings(unit.program)
+
+
+def optimize(unit: Unit):
+    unit.program = dag.eliminate(unit.program)
+
+
+def emit(unit: Unit):
+    unit.output = dumps(unit.tokens, unit.TI, unit.TN)
+
+
+STAGES = [
+    Stage('lex', lex, (), ('lexer', 'tokens', 'TI', 'TN')),
+    Stage('layout', layout, ('lex',), ('codes',)),
+    Stage('parse', parse, ('lex',), ('listener', 'symbols', 'program')),
+    Stage('semantics', semantics, ('parse',), ('warnings',)),
+    Stage('optimize', optimize, ('semantics',), ('program',)),
+    Stage('emit', emit, ('lex',), ('output',)),
+]
+
+Hook = Callable[[Stage, Unit], Any]
+
+
+class Pipeline:
+    def __init__(self, stages: List[Stage] = STAGES):
+        self.stages = stages
+        self.by_name = {stage.name: stage for stage in stages}
+        self.before: List[Tuple[Optional[str], Hook]] = []
+        self.after: List[Tuple[Optional[str], Hook]] = []
+
+    def hook(self, before: Optional[Hook] = None, after: Optional[Hook] = None, stage: Optional[str] = None):
+        # stage=None — для всех этапов
+        if before:
+            self.before.append((stage, before))
+        if after:
+            self.after.append((stage, after))
+
+    def select(self, names: Iterable[str]) -> List[Stage]:
+        wanted = set()
+        pending = list(names)
+        while pending:
+            name = pending.pop()
+            if name not in self.by_name:
+                raise ValueError(f"Неизвестный этап '{name}'")
+            if name not in wanted:
+                wanted.add(name)
+                pending.extend(self.by_name[name].requires)
+        return [stage for stage in self.stages if stage.name in wanted]
+
+    def stream(self, code: str, stages: Iterable[str] = ('lex', 'parse'), **options) -> Iterator[Tuple[str, Unit]]:
+        # Выполняет этапы по одному и отдаёт (этап, единица) после каждого; при ошибке — останавливается
+        unit = Unit(code, **options)
+        for stage in self.select(stages):
+            skip = False
+            for name, hook in self.before:
+                if name is None or name == stage.name:
+                    skip = bool(hook(stage, unit)) or skip
+            if not skip:
+                try:
+                    stage.run(unit)
+                except Exception as e:
+                    if isinstance(e, RecursionError):
+                        # Обходы дерева на глубоко вложенных выражениях (семантика, оптимизация)
+                        e = BudgetError(0, f"Превышена допустимая вложенность на этапе {stage.name}")
+                    unit.error = e
+                    unit.diagnostics.append(diagnostic(e))
+            for name, hook in self.after:
+                if name is None or name == stage.name:
+                    hook(stage, unit)
+            yield stage.name, unit
+            if unit.error is not None:
+                return
+
+    def run(self, code: str, stages: Iterable[str] = ('lex', 'parse'), **options) -> Unit:
+        unit = None
+        for _, unit in self.stream(code, stages, **options):
+            pass
+        return unit or Unit(code, **options)
+
+
+class Timer:
+    # Хук замера времени: суммарные секунды и число запусков по этапам
+    def __init__(self):
+        self.started: Dict[int, float] = {}
+        self.totals: Dict[str, float] = {}
+        self.counts: Dict[str, int] = {}
+
+    def attach(self, pipeline: Pipeline) -> 'Timer':
+        pipeline.hook(self.before, self.after)
+        return self
+
+    def before(self, stage: Stage, unit: Unit):
+        self.started[id(unit)] = time.perf_counter()
+
+    def after(self, stage: Stage, unit: Unit):
+        elapsed = time.perf_counter() - self.started.pop(id(unit))
+        self.totals[stage.name] = self.totals.get(stage.name, 0.0) + elapsed
+        self.counts[stage.name] = self.counts.get(stage.name, 0) + 1
+
+
+class Cache:
+    # Хук кэширования: результаты выбранных этапов по хэшу исходника и опциям,
+    # влияющим на результат (verbose — журнал лексера). Кэшируются только этапы
+    # без побочных эффектов; по умолчанию — лексический анализ. С бюджетом кэш
+    # не используется: его проверки (размер исходника, время) должны выполняться.
+    def __init__(self, stages: Iterable[str] = ('lex',), size: int = 128):
+        self.stages = set(stages)
+        self.size = size
+        self.entries: Dict[Tuple[str, bool, bytes], Dict[str, Any]] = {}
+
+    def attach(self, pipeline: Pipeline) -> 'Cache':
+        pipeline.hook(self.before, self.after)
+        return self
+
+    def _applies(self, stage: Stage, unit: Unit) -> bool:
+        return stage.name in self.stages and unit.options.get('budget') is None
+
+    def _key(self, stage: Stage, unit: Unit) -> Tuple[str, bool, bytes]:
+        digest = hashlib.blake2b(unit.code.encode('utf-8'), digest_size=16).digest()
+        return stage.name, bool(unit.options.get('verbose', False)), digest
+
+    def before(self, stage: Stage, unit: Unit) -> bool:
+        if not self._applies(stage, unit):
+            return False
+        cached = self.entries.get(self._key(stage, unit))
+        if cached is None:
+            return False
+        for field, value in cached.items():
+            setattr(unit, field, value)
+        return True
+
+    def after(self, stage: Stage, unit: Unit):
+        if not self._applies(stage, unit) or unit.error is not None:
+            return
+        if len(self.entries) >= self.size:
+            self.entries.pop(next(iter(self.entries)))
+        self.entries[self._key(stage, unit)] = {field: getattr(unit, field) for field in stage.provides}
+
+
+if __name__ == "__main__":
+    args = argparse.ArgumentParser(description="Компиляция программы модельного языка по выбранным этапам")
+    args.add_argument('source', help="файл программы")
+    args.add_argument('--stages', default='lex,layout,parse,semantics', help="этапы через запятую: " +
+                      ", ".join(stage.name for stage in STAGES))
+    args.add_argument('--output', help="файл для результата этапа emit")
+    options = args.parse_args()
+    with open(options.source, encoding='utf-8') as f:
+        code = f.read()
+
+    pipeline = Pipeline()
+    timer = Timer().attach(pipeline)
+    unit = pipeline.run(code, options.stages.split(','))
+    for n, z, tok in unit.codes:
+        print(f"({n}, {z}) — {tok.value} [строка {tok.line}]")
+    for item in unit.warnings + unit.diagnostics:
+        print(f"[строка {item['line']}] {item['kind'] + ': ' if item['kind'] else ''}{item['message']}")
+    if options.output and unit.output is not None:
+        with open(options.output, 'wb') as f:
+            f.write(unit.output)
+    for name, seconds in timer.totals.items():
+        print(f"{name}: {seconds * 1000:.2f} мс")
@@ -0,0 +1,149 @@
+import argparse
+import json
+import sys
+import time
+from typing import Any, Dict, List, Tuple, Union
+from errors import CompilerError
+from interpreter import Interpreter, MAX_ITERATIONS, Reader, Value, values
+from ir import Block, For, Input, Output, Program, Stmt, While, compile_program
+
+# Профилировщик выполнения: число выполнений операторов по строкам, число входов
+# в цикл и итераций, время ввода/вывода. Ключ — номер строки, записанный лексером
+# в Token и перенесённый в ir. Учёт — словари целых, без замера времени каждого
+# оператора: часы читаются только вокруг ввода/вывода.
+
+
+class Profiler(Interpreter):
+    def __init__(self, program: Program, read: Reader, max_iterations: int = MAX_ITERATIONS):
+        super().__init__(program, read, max_iterations)
+        self.hits: Dict[int, int] = {}                  # строка -> выполнений оператора
+        self.loops: Dict[int, List[int]] = {}           # строка цикла -> [входов, итераций]
+        self.io: Dict[int, List[Union[str, int, float]]] = {}  # строка -> [вид, вызовов, секунд]
+        self.elapsed = 0.0
+
+    def run(self) -> Dict[str, Value]:
+        start = time.perf_counter()
+        try:
+            return super().run()
+        finally:
+            self.elapsed = time.perf_counter() - start
+
+    def execute(self, stmt: Stmt):
+        # Составной оператор сам работы не выполняет — считаются вложенные
+        if stmt.__class__ is not Block:
+            hits = self.hits
+            hits[stmt.line] = hits.get(stmt.line, 0) + 1
+        super().execute(stmt)
+
+    def fixed_loop(self, stmt: For):
+        self.loops.setdefault(stmt.line, [0, 0])[0] += 1
+        super().fixed_loop(stmt)
+
+    def conditional_loop(self, stmt: While):
+        self.loops.setdefault(stmt.line, [0, 0])[0] += 1
+        super().conditional_loop(stmt)
+
+    def iteration(self, stmt: Union[For, While]):
+        self.loops[stmt.line][1] += 1
+
+    def _timed(self, kind: str, line: int, started: float):
+        entry = self.io.setdefault(line, [kind, 0, 0.0])
+        entry[1] += 1
+        entry[2] += time.perf_counter() - started
+
+    def read(self, stmt: Input, name: str) -> Value:
+        started = time.perf_counter()
+        try:
+            return super().read(stmt, name)
+        finally:
+            self._timed('input', stmt.line, started)
+
+    def write(self, stmt: Output, values: Tuple[Value, ...]):
+        started = time.perf_counter()
+        try:
+            super().write(stmt, values)
+        finally:
+            self._timed('output', stmt.line, started)
+
+    def heat(self) -> Dict[int, float]:
+        # Доля от самой «горячей» строки, 0..1 — для подсветки в редакторе
+        peak = max(self.hits.values(), default=0)
+        return {line: count / peak for line, count in self.hits.items()} if peak else {}
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            'elapsed': self.elapsed,
+            'lines': {str(line): count for line, count in sorted(self.hits.items())},
+            'loops': {
+                str(line): {'entries': entries, 'iterations': iterations}
+                for line, (entries, iterations) in sorted(self.loops.items())
+            },
+            'io': {
+                str(line): {'kind': kind, 'calls': calls, 'seconds': seconds}
+                for line, (kind, calls, seconds) in sorted(self.io.items())
+            },
+        }
+
+    def save(self, path: str):
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(self.to_dict(), f, ensure_ascii=False, indent=2)
+
+    def report(self, code: str) -> str:
+        # Исходник с числом выполнений и итераций на полях
+        lines = []
+        for number, text in enumerate(code.splitlines(), 1):
+            hits = self.hits.get(number)
+            note = ""
+            if number in self.loops:
+                entries, iterations = self.loops[number]
+                note += f"  [входов {entries}, итераций {iterations}]"
+            if number in self.io:
+                kind, calls, seconds = self.io[number]
+                note += f"  [{kind}: {calls} × {seconds / calls * 1000:.3f} мс]"
+            lines.append(f"{hits if hits else '':>8} | {text}{note}")
+        lines.append(f"Время выполнения: {self.elapsed * 1000:.2f} мс")
+        return "\n".join(lines)
+
+
+def profile(program: Program, read: Reader, max_iterations: int = MAX_ITERATIONS) -> Profiler:
+    profiler = Profiler(program, read, max_iterations)
+    profiler.run()
+    return profiler
+
+
+def _prompt(name: str, type: str) -> str:
+    return input(f"{name} ({type}): ")
+
+
+if __name__ == "__main__":
+    args = argparse.ArgumentParser(description="Выполнение программы модельного языка с профилированием")
+    args.add_argument('source', help="файл программы")
+    args.add_argument('--input', action='append', default=[], metavar='ИМЯ=З1,З2',
+                      help="значения для input по порядку; без них значения запрашиваются")
+    args.add_argument('--report', help="JSON-файл отчёта")
+    args.add_argument('--max-iterations', type=int, default=MAX_ITERATIONS)
+    options = args.parse_args()
+    with open(options.source, encoding='utf-8') as f:
+        code = f.read()
+
+    read = _prompt
+    if options.input:
+        inputs = {}
+        for item in options.input:
+            name, _, column = item.partition('=')
+            inputs[name] = column.split(',')
+        read = values(inputs)
+
+    try:
+        profiler = Profiler(compile_program(code), read, options.max_iterations)
+    except CompilerError as e:
+        sys.exit(str(e))
+    try:
+        profiler.run()
+    except CompilerError as e:
+        print(e, file=sys.stderr)
+    for line, result in profiler.outputs:
+        print(f"[строка {line}]", *("true" if v is True else "false" if v is False else v for v in result))
+    print(profiler.report(code))
+    if options.report:
+        profiler.save(options.report)
@@ -0,0 +1,209 @@
+import struct
+from typing import Dict, List, Optional, Sequence
+from tokens import KEYWORDS, SEPARATORS, Token, TokenType
+
+# Бинарный формат потока токенов (little-endian):
+#   заголовок  — MAGIC, версия, число строк, токенов, |TI|, |TN|, размер блока строк
+#   смещения   — (число строк + 1) x uint32, границы строк в блоке
+#   строки     — UTF-8 блок интернированных строк: сначала TI, затем TN, затем сырые значения чисел
+#   токены     — записи фиксированной ширины без выравнивания: тип, код, строка, столбец
+#   сырые      — uint32 на каждый токен NUMBER по порядку: индекс сырого значения в строках
+MAGIC = b'ATFL'
+VERSION = 2
+
+HEADER = struct.Struct('<4sHIIIII')
+OFFSET = struct.Struct('<I')
+RECORD = struct.Struct('<BIII')
+RAW = struct.Struct('<I')
+
+NO_RAW = 0xFFFFFFFF
+
+# Коды типов совпадают с таблицей (n, z) в GUI
+TYPE_CODES = {
+    TokenType.KEYWORD: 1,
+    TokenType.SEPARATOR: 2,
+    TokenType.IDENTIFIER: 3,
+    TokenType.NUMBER: 4,
+}
+CODE_TYPES = {code: type for type, code in TYPE_CODES.items()}
+
+_KEYWORD_CODES = {word: i for i, word in enumerate(KEYWORDS, 1)}
+_SEPARATOR_CODES = {sep: i for i, sep in enumerate(SEPARATORS, 1)}
+
+
+def token_code(tok: Token, ti_codes: Dict[str, int], tn_codes: Dict[str, int]) -> int:
+    # Номер токена в своей таблице; ti_codes/tn_codes — индексы TI/TN, начиная с 1
+    if tok.type == TokenType.KEYWORD:
+        return _KEYWORD_CODES[tok.value]
+    elif tok.type == TokenType.SEPARATOR:
+        return _SEPARATOR_CODES[tok.value]
+    elif tok.type == TokenType.IDENTIFIER:
+        return ti_codes[tok.value]
+    return tn_codes[tok.value]
+
+
+def dumps(tokens: Sequence[Token], TI: Sequence[str], TN: Sequence[str]) -> bytes:
+    strings: List[str] = list(TI) + list(TN)
+    ti_codes = {name: i for i, name in enumerate(TI, 1)}
+    tn_codes = {num: i for i, num in enumerate(TN, 1)}
+    raw_index: Dict[str, int] = {}
+    raws: List[int] = []
+
+    records = bytearray(RECORD.size * len(tokens))
+    for i, tok in enumerate(tokens):
+        code = token_code(tok, ti_codes, tn_codes)
+
+        # Сырое значение есть только у чисел — хранится отдельно, а не в каждой записи
+        if tok.type == TokenType.NUMBER:
+            raw = NO_RAW
+            if tok.raw_value is not None:
+                raw = raw_index.get(tok.raw_value)
+                if raw is None:
+                    raw = raw_index[tok.raw_value] = len(strings)
+                    strings.append(tok.raw_value)
+            raws.append(raw)
+        elif tok.raw_value is not None:
+            raise ValueError(f"Сырое значение допускается только у чисел: {tok}")
+
+        RECORD.pack_into(records, i * RECORD.size, TYPE_CODES[tok.type], code, tok.line, tok.col)
+
+    encoded = [s.encode('utf-8') for s in strings]
+    offsets = bytearray(OFFSET.size * (len(encoded) + 1))
+    end = 0
+    for i, blob in enumerate(encoded):
+        OFFSET.pack_into(offsets, i * OFFSET.size, end)
+        end += len(blob)
+    OFFSET.pack_into(offsets, len(encoded) * OFFSET.size, end)
+
+    header = HEADER.pack(MAGIC, VERSION, len(strings), len(tokens), len(TI), len(TN), end)
+    return b''.join((header, offsets, *encoded, records, struct.pack(f'<{len(raws)}I', *raws)))
+
+
+class TokenStream:
+    # Представление сериализованного потока без копирования: записи читаются
+    # через struct.unpack_from прямо из memoryview по требованию
+    def __init__(self, data) -> None:
+        self.buffer = memoryview(data)
+        if len(self.buffer) < HEADER.size:
+            raise ValueError("Недостаточно данных для заголовка потока токенов")
+        magic, version, n_strings, n_tokens, n_ti, n_tn, blob_size = HEADER.unpack_from(self.buffer, 0)
+        if magic != MAGIC:
+            raise ValueError("Неверная сигнатура потока токенов")
+        if version != VERSION:
+            raise ValueError(f"Неподдерживаемая версия формата: {version}")
+
+        self.n_strings = n_strings
+        self.n_tokens = n_tokens
+        self.n_ti = n_ti
+        self.n_tn = n_tn
+        self.offsets_at = HEADER.size
+        self.strings_at = self.offsets_at + OFFSET.size * (n_strings + 1)
+        self.records_at = self.strings_at + blob_size
+        self.raws_at = self.records_at + RECORD.size * n_tokens
+        if len(self.buffer) < self.raws_at:
+            raise ValueError("Поток токенов обрезан")
+        # Сырых значений столько, сколько записей NUMBER: первый байт записи — тип
+        self.types = bytes(self.buffer[self.records_at:self.raws_at:RECORD.size])
+        self.n_raws = self.types.count(TYPE_CODES[TokenType.NUMBER])
+        if len(self.buffer) < self.raws_at + RAW.size * self.n_raws:
+            raise ValueError("Поток токенов обрезан")
+        self._strings: List[Optional[str]] = [None] * n_strings
+        self._numbers: Optional[Dict[int, int]] = None   # индекс токена NUMBER -> его номер среди чисел
+
+    def string(self, index: int) -> str:
+        cached = self._strings[index]
+        if cached is None:
+            start, = OFFSET.unpack_from(self.buffer, self.offsets_at + index * OFFSET.size)
+            end, = OFFSET.unpack_from(self.buffer, self.offsets_at + (index + 1) * OFFSET.size)
+            cached = self._strings[index] = str(self.buffer[self.strings_at + start:self.strings_at + end], 'utf-8')
+        return cached
+
+    @property
+    def TI(self) -> List[str]:
+        return [self.string(i) for i in range(self.n_ti)]
+
+    @property
+    def TN(self) -> List[str]:
+        return [self.string(self.n_ti + i) for i in range(self.n_tn)]
+
+    def record(self, index: int):
+        # (n, z, строка, столбец) без построения Token
+        if not 0 <= index < self.n_tokens:
+            raise IndexError("Индекс токена вне диапазона")
+        return RECORD.unpack_from(self.buffer, self.records_at + index * RECORD.size)
+
+    def raw(self, index: int) -> Optional[str]:
+        # Сырое значение токена; номера чисел строятся один раз по байтам типов записей
+        if self._numbers is None:
+            number = TYPE_CODES[TokenType.NUMBER]
+            positions = [i for i, type_code in enumerate(self.types) if type_code == number]
+            self._numbers = {i: n for n, i in enumerate(positions)}
+        n = self._numbers.get(index)
+        if n is None:
+            return None
+        raw, = RAW.unpack_from(self.buffer, self.raws_at + n * RAW.size)
+        return None if raw == NO_RAW else self.string(raw)
+
+    def __len__(self) -> int:
+        return self.n_tokens
+
+    def __getitem__(self, index: int) -> Token:
+        if index < 0:
+            index += self.n_tokens
+        if not 0 <= index < self.n_tokens:
+            raise IndexError("Индекс токена вне диапазона")
+        type_code, code, line, col = RECORD.unpack_from(self.buffer, self.records_at + index * RECORD.size)
+        type = CODE_TYPES[type_code]
+        if type == TokenType.KEYWORD:
+            value = KEYWORDS[code - 1]
+        elif type == TokenType.SEPARATOR:
+            value = SEPARATORS[code - 1]
+        elif type == TokenType.IDENTIFIER:
+            value = self.string(code - 1)
+        else:
+            value = self.string(self.n_ti + code - 1)
+        return Token(type, value, line, col, self.raw(index) if type == TokenType.NUMBER else None)
+
+    def __iter__(self):
+        for i in range(self.n_tokens):
+            yield self[i]
+
+    def tokens(self) -> List[Token]:
+        # Разбор всего потока за один проход: строки декодируются один раз,
+        # записи читаются iter_unpack, Token собирается без вызова конструктора
+        blob = bytes(self.buffer[self.strings_at:self.records_at])
+        bounds = [end for end, in OFFSET.iter_unpack(self.buffer[self.offsets_at:self.strings_at])]
+        strings = [str(blob[start:end], 'utf-8') for start, end in zip(bounds, bounds[1:])]
+        values = {
+            TYPE_CODES[TokenType.KEYWORD]: KEYWORDS,
+            TYPE_CODES[TokenType.SEPARATOR]: SEPARATORS,
+            TYPE_CODES[TokenType.IDENTIFIER]: strings[:self.n_ti],
+            TYPE_CODES[TokenType.NUMBER]: strings[self.n_ti:self.n_ti + self.n_tn],
+        }
+        new = tuple.__new__
+        tokens = [
+            new(Token, (CODE_TYPES[type_code], values[type_code][code - 1], line, col, None))
+            for type_code, code, line, col in RECORD.iter_unpack(self.buffer[self.records_at:self.raws_at])
+        ]
+        # Чисел мало: сырые значения подставляются после, поиском байта типа NUMBER
+        number = bytes((TYPE_CODES[TokenType.NUMBER],))
+        index = -1
+        for raw, in RAW.iter_unpack(self.buffer[self.raws_at:self.raws_at + RAW.size * self.n_raws]):
+            index = self.types.find(number, index + 1)
+            if raw != NO_RAW:
+                tokens[index] = new(Token, (*tokens[index][:4], strings[raw]))
+        return tokens
+
+
+def loads(data) -> TokenStream:
+    return TokenStream(data)
+
+
+def dump(path: str, tokens: Sequence[Token], TI: Sequence[str], TN: Sequence[str]) -> None:
+    with open(path, 'wb') as f:
+        f.write(dumps(tokens, TI, TN))
+
+
+def load(path: str) -> TokenStream:
+    with open(path, 'rb') as f:
+        return TokenStream(f.read())
@@ -0,0 +1,300 @@
+import argparse
+import asyncio
+import json
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Any, Awaitable, Dict, List, Optional
+import compiler
+from budget import Budget, safe_depth
+from serialize import TYPE_CODES, token_code
+
+# Локальный сервис компиляции: JSON-RPC 2.0, один запрос на строку.
+#   compile {"code": str, "parse": bool} -> {"tokens", "TI", "TN", "diagnostics"}
+#   stats   {}                           -> счётчики пропускной способности и задержки очереди
+QUEUE_SIZE = 256        # Граница очереди: при заполнении чтение из сокетов приостанавливается
+BATCH_SIZE = 32         # Не больше запросов в одной пачке
+BATCH_BYTES = 64 * 1024 # Мелкие запросы объединяются, пока суммарный размер кода меньше этого
+LINE_LIMIT = 256 * 1024 * 1024 # Максимальная длина строки запроса (весь исходник внутри JSON)
+
+# Ограничения одной компиляции (см. budget.Budget): патологический вход не должен занимать процесс надолго
+LIMITS = {
+    'max_source': 64 * 1024 * 1024,
+    'max_tokens': 20_000_000,
+    'max_depth': safe_depth(),
+    'max_time': 10.0,
+}
+
+PARSE_ERROR = -32700
+INVALID_REQUEST = -32600
+METHOD_NOT_FOUND = -32601
+INVALID_PARAMS = -32602
+
+
+def compile_source(code: str, parse: bool = True, limits: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+    result = compiler.compile_source(code, parse, Budget(**limits) if limits else None)
+    ti_codes = {name: i for i, name in enumerate(result.TI, 1)}
+    tn_codes = {num: i for i, num in enumerate(result.TN, 1)}
+    return {
+        'tokens': [
+            [TYPE_CODES[tok.type], token_code(tok, ti_codes, tn_codes), tok.value, tok.line, tok.col]
+            for tok in result.tokens
+        ],
+        'TI': result.TI,
+        'TN': result.TN,
+        'diagnostics': result.diagnostics,
+    }
+
+
+def compile_batch(batch: List[tuple], limits: Optional[Dict[str, Any]] = None) -> List[Dict[str, Any]]:
+    return [compile_source(code, parse, limits) for code, parse in batch]
+
+
+def _warm_up():
+    # Прогрев процесса: импорт модулей и первый проход Lexer/Parser
+    compile_source("a : integer;\na = 1\nend")
+
+
+class Stats:
+    def __init__(self) -> None:
+        self.started = time.perf_counter()
+        self.completed = 0
+        self.batches = 0
+        self.rejected = 0
+        self.wait_total = 0.0
+        self.wait_max = 0.0
+
+    def record_wait(self, wait: float):
+        self.wait_total += wait
+        self.wait_max = max(self.wait_max, wait)
+
+    def snapshot(self, queue: asyncio.Queue) -> Dict[str, Any]:
+        uptime = time.perf_counter() - self.started
+        return {
+            'uptime': uptime,
+            'completed': self.completed,
+            'batches': self.batches,
+            'rejected': self.rejected,
+            'queued': queue.qsize(),
+            'throughput': self.completed / uptime if uptime else 0.0,
+            'avg_batch': self.completed / self.batches if self.batches else 0.0,
+            'queue_latency_avg': self.wait_total / self.completed if self.completed else 0.0,
+            'queue_latency_max': self.wait_max,
+        }
+
+
+class CompileServer:
+    def __init__(self, workers: Optional[int] = None, queue_size: int = QUEUE_SIZE,
+                 batch_size: int = BATCH_SIZE, batch_bytes: int = BATCH_BYTES,
+                 limits: Optional[Dict[str, Any]] = None) -> None:
+        self.workers = workers or os.cpu_count() or 1
+        self.queue_size = queue_size
+        self.batch_size = batch_size
+        self.batch_bytes = batch_bytes
+        self.limits = LIMITS if limits is None else limits
+        self.stats = Stats()
+        self.queue: Optional[asyncio.Queue] = None
+        self.pool: Optional[ProcessPoolExecutor] = None
+        self._dispatcher: Optional[asyncio.Task] = None
+        self._slots: Optional[asyncio.Semaphore] = None
+        self._inflight = set()
+
+    async def start(self):
+        loop = asyncio.get_running_loop()
+        self.queue = asyncio.Queue(self.queue_size)
+        self._slots = asyncio.Semaphore(self.workers)
+        self.pool = self._new_pool()
+        # Запускаем все процессы сразу, чтобы первый запрос не платил за старт
+        await asyncio.gather(*(loop.run_in_executor(self.pool, compile_batch, []) for _ in range(self.workers)))
+        self.stats = Stats()
+        self._dispatcher = asyncio.create_task(self._dispatch())
+
+    def _new_pool(self) -> ProcessPoolExecutor:
+        return ProcessPoolExecutor(max_workers=self.workers, initializer=_warm_up)
+
+    def _restart_pool(self):
+        # Гибель процесса (например, по нехватке памяти) оставляет пул сломанным навсегда
+        self.pool.shutdown(wait=False, cancel_futures=True)
+        self.pool = self._new_pool()
+
+    def _submit(self, jobs: List[tuple]) -> asyncio.Future:
+        loop = asyncio.get_running_loop()
+        try:
+            return loop.run_in_executor(self.pool, compile_batch, jobs, self.limits)
+        except BrokenProcessPool:
+            self._restart_pool()
+            return loop.run_in_executor(self.pool, compile_batch, jobs, self.limits)
+
+    async def close(self):
+        if self._dispatcher:
+            self._dispatcher.cancel()
+        if self.pool:
+            self.pool.shutdown(cancel_futures=True)
+
+    async def enqueue(self, code: str, parse: bool = True) -> asyncio.Future:
+        # Ограниченная очередь: put ждёт свободного места. Вызывается из цикла чтения
+        # соединения, поэтому при заполнении очереди новые запросы не читаются из сокета
+        future = asyncio.get_running_loop().create_future()
+        await self.queue.put((code, parse, time.perf_counter(), future))
+        return future
+
+    async def submit(self, code: str, parse: bool = True) -> Dict[str, Any]:
+        return await (await self.enqueue(code, parse))
+
+    async def _dispatch(self):
+        while True:
+            # Пачку забираем только при свободном процессе, иначе запросы копятся в очереди
+            await self._slots.acquire()
+            batch = [await self.queue.get()]
+            size = len(batch[0][0])
+            while len(batch) < self.batch_size and size < self.batch_bytes and not self.queue.empty():
+                item = self.queue.get_nowait()
+                batch.append(item)
+                size += len(item[0])
+
+            now = time.perf_counter()
+            for _, _, enqueued, _ in batch:
+                self.stats.record_wait(now - enqueued)
+            task = self._submit([(code, parse) for code, parse, _, _ in batch])
+            pool = self.pool
+            self._inflight.add(task)
+            task.add_done_callback(lambda done, batch=batch, pool=pool: self._finish(done, batch, pool))
+
+    def _finish(self, done: asyncio.Future, batch: List[tuple], pool: ProcessPoolExecutor):
+        self._inflight.discard(done)
+        # Пул пересоздаётся один раз: остальные пачки сломанного пула придут с той же ошибкой
+        if not done.cancelled() and isinstance(done.exception(), BrokenProcessPool) and pool is self.pool:
+            self._restart_pool()
+        self._slots.release()
+        self.stats.batches += 1
+        if done.cancelled():
+            for *_, future in batch:
+                future.cancel()
+            return
+        error = done.exception()
+        for i, (*_, future) in enumerate(batch):
+            if future.done():
+                continue
+            if error:
+                future.set_exception(error)
+            else:
+                self.stats.completed += 1
+                future.set_result(done.result()[i])
+
+    async def accept(self, request: Any) -> Awaitable[Optional[Dict[str, Any]]]:
+        # Проверка запроса и постановка в очередь; возвращает ожидание ответа,
+        # которое ждёт только результата компиляции
+        if not isinstance(request, dict) or request.get('jsonrpc') != '2.0' or 'method' not in request:
+            return self._reply(None, _error(None, INVALID_REQUEST, "Некорректный запрос"))
+        id = request.get('id')
+        params = request.get('params') or {}
+        method = request['method']
+        if method == 'compile':
+            code = params.get('code') if isinstance(params, dict) else None
+            if not isinstance(code, str):
+                return self._reply(id, _error(id, INVALID_PARAMS, "Ожидался параметр 'code' (строка)"))
+            return self._result(id, await self.enqueue(code, bool(params.get('parse', True))))
+        elif method == 'stats':
+            return self._reply(id, {'jsonrpc': '2.0', 'id': id, 'result': self.stats.snapshot(self.queue)})
+        return self._reply(id, _error(id, METHOD_NOT_FOUND, f"Неизвестный метод '{method}'"))
+
+    async def _reply(self, id, response: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        # Уведомления (без id) ответа не получают, кроме ошибок разбора запроса
+        if id is None and 'error' not in response:
+            return None
+        return response
+
+    async def _result(self, id, future: asyncio.Future) -> Optional[Dict[str, Any]]:
+        try:
+            result = await future
+        except Exception as e:
+            self.stats.rejected += 1
+            return _error(id, -32000, str(e))
+        if id is None:
+            return None
+        return {'jsonrpc': '2.0', 'id': id, 'result': result}
+
+    async def handle(self, request: Any) -> Optional[Dict[str, Any]]:
+        return await (await self.accept(request))
+
+    async def serve_connection(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        pending = set()
+
+        async def respond(reply: Awaitable[Optional[Dict[str, Any]]]):
+            response = await reply
+            if response is not None:
+                writer.write(json.dumps(response, ensure_ascii=False).encode('utf-8') + b'\n')
+                await writer.drain()
+
+        try:
+            while True:
+                try:
+                    line = await reader.readuntil(b'\n')
+                except asyncio.IncompleteReadError as e:
+                    line = e.partial    # последняя строка без перехода
+                except asyncio.LimitOverrunError:
+                    await _skip_line(reader)
+                    writer.write(json.dumps(_error(None, INVALID_REQUEST, f"Строка запроса длиннее {LINE_LIMIT} байт")).encode('utf-8') + b'\n')
+                    continue
+                if not line:
+                    break
+                try:
+                    request = json.loads(line)
+                except ValueError:
+                    writer.write(json.dumps(_error(None, PARSE_ERROR, "Ошибка разбора JSON")).encode('utf-8') + b'\n')
+                    continue
+                # Постановка в очередь — здесь, в цикле чтения: пока очередь полна, следующая
+                # строка не читается. Ответы пишутся по мере готовности отдельными задачами
+                reply = await self.accept(request)
+                task = asyncio.create_task(respond(reply))
+                pending.add(task)
+                task.add_done_callback(pending.discard)
+        finally:
+            # Уже принятые запросы получают ответ и при обрыве цикла чтения
+            if pending:
+                await asyncio.wait(pending)
+            writer.close()
+
+
+async def _skip_line(reader: asyncio.StreamReader):
+    # Остаток слишком длинной строки отбрасывается по частям до перехода строки
+    while True:
+        try:
+            await reader.readuntil(b'\n')
+            return
+        except asyncio.IncompleteReadError:
+            return
+        except asyncio.LimitOverrunError as e:
+            await reader.readexactly(e.consumed)
+
+
+def _error(id, code: int, message: str) -> Dict[str, Any]:
+    return {'jsonrpc': '2.0', 'id': id, 'error': {'code': code, 'message': message}}
+
+
+async def serve(host: str = '127.0.0.1', port: int = 8765, socket_path: Optional[str] = None,
+                workers: Optional[int] = None, limits: Optional[Dict[str, Any]] = None):
+    server = CompileServer(workers, limits=limits)
+    await server.start()
+    if socket_path:
+        listener = await asyncio.start_unix_server(server.serve_connection, path=socket_path, limit=LINE_LIMIT)
+    else:
+        listener = await asyncio.start_server(server.serve_connection, host, port, limit=LINE_LIMIT)
+    try:
+        async with listener:
+            await listener.serve_forever()
+    finally:
+        await server.close()
+
+
+if __name__ == "__main__":
+    args = argparse.ArgumentParser(description="Локальный сервис компиляции модельного языка")
+    args.add_argument('--host', default='127.0.0.1')
+    args.add_argument('--port', type=int, default=8765)
+    args.add_argument('--socket', help="путь к Unix-сокету вместо TCP")
+    args.add_argument('--workers', type=int, help="число процессов-компиляторов")
+    args.add_argument('--max-time', type=float, default=LIMITS['max_time'], help="предел времени одной компиляции, с")
+    options = args.parse_args()
+    limits = dict(LIMITS, max_time=options.max_time)
+    asyncio.run(serve(options.host, options.port, options.socket, options.workers, limits))
@@ -51,6 +51,7 @@ SEPARATORS = [
 
 LETTER_SEPARATORS = [sep for sep in SEPARATORS if sep.isalpha()]
 SYMBOL_SEPARATORS = [sep for sep in SEPARATORS if not sep.isalpha()]
+SYMBOL_SEPARATORS_LONGEST_FIRST = sorted(SYMBOL_SEPARATORS, key=len, reverse=True) # '(*' раньше '('
 
 class TokenType(StrEnum):
     KEYWORD = 'KEYWORD'
@@ -0,0 +1,190 @@
+from typing import Dict, List, NamedTuple, Optional, Tuple
+import numpy as np
+from errors import ExecutionError
+from ir import Assign, Block, Const, Expr, For, If, Input, Output, Program, Stmt, Unary, Var, While
+
+# Векторное выполнение: программа прогоняется сразу по всем строкам таблицы входов.
+# Каждая переменная — массив по строкам; ветвления и циклы выполняются под маской
+# активных строк, поэтому число проходов равно числу операторов (и итераций цикла
+# для самой «долгой» строки), а не числу строк.
+#
+# Семантика та же, что у interpreter.py: деление на ноль в активной строке — ошибка
+# выполнения; каждый input берёт следующее значение переменной в своей строке —
+# столбец входа либо одно значение на строку, либо таблица строк × значений.
+#
+# for (начало; граница; шаг) <оператор> — скрытый счётчик от начала до границы
+# (не включая) с шагом; по умолчанию начало 0, граница 0, шаг 1.
+
+DTYPES = {
+    'integer': np.int64,
+    'real': np.float64,
+    'boolean': np.bool_,
+}
+
+MAX_ITERATIONS = 1_000_000
+
+RELATIONS = {
+    'NE': np.not_equal,
+    'EQ': np.equal,
+    'LT': np.less,
+    'LE': np.less_equal,
+    'GT': np.greater,
+    'GE': np.greater_equal,
+}
+
+ARITHMETIC = {
+    'plus': np.add,
+    'min': np.subtract,
+    'mult': np.multiply,
+    'div': np.true_divide,
+}
+
+
+class BatchResult(NamedTuple):
+    variables: Dict[str, np.ndarray]
+    # (строка программы, значения выражений, маска строк, для которых вывод выполнен)
+    outputs: List[Tuple[int, Tuple[np.ndarray, ...], np.ndarray]]
+
+
+class VectorExecutor:
+    def __init__(self, program: Program, inputs: Dict[str, object], max_iterations: int = MAX_ITERATIONS):
+        self.program = program
+        self.max_iterations = max_iterations
+
+        lengths = {len(np.asarray(column)) for column in inputs.values()}
+        if len(lengths) > 1:
+            raise ExecutionError(0, "Столбцы входных данных имеют разную длину")
+        self.rows = lengths.pop() if lengths else 1
+
+        self.inputs: Dict[str, np.ndarray] = {}
+        self.cursors: Dict[str, np.ndarray] = {}   # номер следующего значения входа по строкам
+        for name, column in inputs.items():
+            if name not in program.symbols:
+                raise ExecutionError(0, f"Входной столбец '{name}' не соответствует переменной программы")
+            column = np.asarray(column).astype(DTYPES[program.symbols[name]], copy=False)
+            self.inputs[name] = column[:, np.newaxis] if column.ndim == 1 else column
+            self.cursors[name] = np.zeros(self.rows, np.int64)
+
+        self.env: Dict[str, np.ndarray] = {
+            name: np.zeros(self.rows, DTYPES[type]) for name, type in program.symbols.items()
+        }
+        self.outputs: List[Tuple[int, Tuple[np.ndarray, ...], np.ndarray]] = []
+
+    def run(self) -> BatchResult:
+        if self.rows == 0:
+            # Пустая таблица входов: выполнять нечего, переменные — пустые столбцы
+            return BatchResult(self.env, self.outputs)
+        with np.errstate(all='ignore'):
+            for stmt in self.program.body:
+                self.execute(stmt, None)
+        return BatchResult(self.env, self.outputs)
+
+    def _full(self, value, type: str) -> np.ndarray:
+        return np.broadcast_to(np.asarray(value, DTYPES[type]), (self.rows,)).copy()
+
+    def _active(self, mask: Optional[np.ndarray]) -> np.ndarray:
+        return np.ones(self.rows, np.bool_) if mask is None else mask
+
+    # mask — строки, для которых оператор выполняется; None — все строки
+    def execute(self, stmt: Stmt, mask: Optional[np.ndarray]):
+        if isinstance(stmt, Assign):
+            self.assign(stmt.name, self.evaluate(stmt.expr, mask), mask)
+        elif isinstance(stmt, Block):
+            for inner in stmt.body:
+                self.execute(inner, mask)
+        elif isinstance(stmt, If):
+            cond = self._full(self.evaluate(stmt.cond, mask), 'boolean')
+            then_mask = cond if mask is None else cond & mask
+            if then_mask.any():
+                self.execute(stmt.then, then_mask)
+            if stmt.orelse is not None:
+                else_mask = ~cond if mask is None else ~cond & mask
+                if else_mask.any():
+                    self.execute(stmt.orelse, else_mask)
+        elif isinstance(stmt, For):
+            self.fixed_loop(stmt, mask)
+        elif isinstance(stmt, While):
+            self.conditional_loop(stmt, mask)
+        elif isinstance(stmt, Input):
+            for name in stmt.names:
+                self.read(stmt, name, mask)
+        elif isinstance(stmt, Output):
+            values = tuple(self._full(self.evaluate(expr, mask), expr.type) for expr in stmt.exprs)
+            self.outputs.append((stmt.line, values, self._active(mask).copy()))
+
+    def assign(self, name: str, value, mask: Optional[np.ndarray]):
+        type = self.program.symbols[name]
+        if mask is None:
+            self.env[name] = self._full(value, type)
+        else:
+            self.env[name] = np.where(mask, np.asarray(value).astype(DTYPES[type], copy=False), self.env[name])
+
+    def read(self, stmt: Input, name: str, mask: Optional[np.ndarray]):
+        if name not in self.inputs:
+            raise ExecutionError(stmt.line, f"Нет входного столбца для переменной '{name}'")
+        column = self.inputs[name]
+        cursor = self.cursors[name]
+        active = self._active(mask)
+        if (cursor[active] >= column.shape[1]).any():
+            raise ExecutionError(stmt.line, f"Нет входного значения для переменной '{name}'")
+        self.assign(name, column[np.arange(self.rows), np.minimum(cursor, column.shape[1] - 1)], mask)
+        self.cursors[name] = cursor + active
+
+    def fixed_loop(self, stmt: For, mask: Optional[np.ndarray]):
+        counter = self._full(self.evaluate(stmt.start, mask) if stmt.start else 0, 'integer')
+        stop = self._full(self.evaluate(stmt.stop, mask) if stmt.stop else 0, 'integer')
+        step = self._full(self.evaluate(stmt.step, mask) if stmt.step else 1, 'integer')
+        active = self._active(mask)
+        iterations = 0
+        while True:
+            active = active & (((step > 0) & (counter < stop)) | ((step < 0) & (counter > stop)))
+            if not active.any():
+                return
+            iterations += 1
+            if iterations > self.max_iterations:
+                raise ExecutionError(stmt.line, "Превышено допустимое число итераций цикла for")
+            self.execute(stmt.body, active)
+            counter = np.where(active, counter + step, counter)
+
+    def conditional_loop(self, stmt: While, mask: Optional[np.ndarray]):
+        active = self._active(mask)
+        iterations = 0
+        while True:
+            active = active & self._full(self.evaluate(stmt.cond, active), 'boolean')
+            if not active.any():
+                return
+            iterations += 1
+            if iterations > self.max_iterations:
+                raise ExecutionError(stmt.line, "Превышено допустимое число итераций цикла do while")
+            self.execute(stmt.body, active)
+
+    # Выражения не имеют побочных эффектов, поэтому вычисляются сразу для всех строк;
+    # mask нужна только для проверки делителя — ошибка лишь в активных строках
+    def evaluate(self, expr: Expr, mask: Optional[np.ndarray]):
+        if isinstance(expr, Var):
+            return self.env[expr.name]
+        elif isinstance(expr, Const):
+            return DTYPES[expr.type](expr.value)
+        elif isinstance(expr, Unary):
+            return np.logical_not(self.evaluate(expr.operand, mask))
+
+        left = self.evaluate(expr.left, mask)
+        right = self.evaluate(expr.right, mask)
+        if expr.op in RELATIONS:
+            return RELATIONS[expr.op](left, right)
+        if expr.op in ('or', 'and'):
+            if expr.type == 'integer':
+                return np.bitwise_or(left, right) if expr.op == 'or' else np.bitwise_and(left, right)
+            result = np.logical_or(left, right) if expr.op == 'or' else np.logical_and(left, right)
+            return result.astype(DTYPES[expr.type])
+        if expr.op == 'div' and np.any((np.asarray(right) == 0) & self._active(mask)):
+            raise ExecutionError(expr.line, "Деление на ноль")
+        if expr.type == 'boolean':
+            # Арифметика над логическими значениями — в целых числах, результат — отличие от нуля
+            result = ARITHMETIC[expr.op](np.asarray(left, np.int8), np.asarray(right, np.int8))
+            return result != 0
+        return ARITHMETIC[expr.op](left, right)
+
+
+def run_batch(program: Program, inputs: Dict[str, object], max_iterations: int = MAX_ITERATIONS) -> BatchResult:
+    return VectorExecutor(program, inputs, max_iterations).run()
@@ -0,0 +1,144 @@
+import argparse
+import fnmatch
+import hashlib
+import os
+import time
+from typing import Any, Dict, Iterator, List, NamedTuple, Optional, Tuple
+from compiler import compile_source
+from errors import diagnostic
+
+# Режим наблюдения: опрос дерева каталогов без системных API. Содержимое файла
+# перечитывается только при смене mtime/размера, анализ запускается только при
+# смене хэша содержимого; списки каталогов перечитываются только при смене их mtime.
+
+Diagnostics = List[Dict[str, Any]]
+
+
+class FileState(NamedTuple):
+    mtime: int
+    size: int
+    digest: bytes
+    diagnostics: Diagnostics
+
+
+class DirState(NamedTuple):
+    mtime: int
+    files: Tuple[str, ...]
+    dirs: Tuple[str, ...]
+
+
+def analyze(code: str) -> Diagnostics:
+    return compile_source(code).diagnostics
+
+
+class Watcher:
+    def __init__(self, root: str, pattern: str = '*.txt'):
+        self.root = root
+        self.pattern = pattern
+        self.files: Dict[str, FileState] = {}
+        self.dirs: Dict[str, DirState] = {}
+
+    def _listing(self, path: str) -> Optional[DirState]:
+        try:
+            mtime = os.stat(path).st_mtime_ns
+        except OSError:
+            return None
+        cached = self.dirs.get(path)
+        if cached and cached.mtime == mtime:
+            return cached
+        files, dirs = [], []
+        try:
+            with os.scandir(path) as entries:
+                for entry in entries:
+                    if entry.is_dir(follow_symlinks=False):
+                        dirs.append(entry.path)
+                    elif entry.is_file() and fnmatch.fnmatch(entry.name, self.pattern):
+                        files.append(entry.path)
+        except OSError:
+            return None
+        state = self.dirs[path] = DirState(mtime, tuple(sorted(files)), tuple(sorted(dirs)))
+        return state
+
+    def _paths(self) -> Iterator[str]:
+        seen_dirs = set()
+        stack = [self.root]
+        while stack:
+            path = stack.pop()
+            listing = self._listing(path)
+            if listing is None:
+                continue
+            seen_dirs.add(path)
+            yield from listing.files
+            stack.extend(reversed(listing.dirs))
+        for path in list(self.dirs):
+            if path not in seen_dirs:
+                del self.dirs[path]
+
+    def _check(self, path: str) -> Optional[Diagnostics]:
+        # None — файл не изменился; иначе новые диагностики
+        try:
+            stat = os.stat(path)
+        except OSError:
+            return None
+        previous = self.files.get(path)
+        if previous and previous.mtime == stat.st_mtime_ns and previous.size == stat.st_size:
+            return None
+        try:
+            with open(path, 'rb') as f:
+                data = f.read()
+        except OSError:
+            return None
+        digest = hashlib.blake2b(data, digest_size=16).digest()
+        if previous and previous.digest == digest:
+            # Файл сохранён без изменений: обновляем отметку, но не анализируем заново
+            self.files[path] = previous._replace(mtime=stat.st_mtime_ns, size=stat.st_size)
+            return None
+        try:
+            diagnostics = analyze(data.decode('utf-8'))
+        except UnicodeDecodeError as e:
+            diagnostics = [diagnostic(e)]
+        self.files[path] = FileState(stat.st_mtime_ns, stat.st_size, digest, diagnostics)
+        return diagnostics
+
+    def scan(self) -> List[Tuple[str, Optional[Diagnostics]]]:
+        # Один проход опроса: (путь, диагностики) для изменённых файлов, (путь, None) для удалённых
+        changes = []
+        current = set()
+        for path in self._paths():
+            current.add(path)
+            diagnostics = self._check(path)
+            if diagnostics is not None:
+                changes.append((path, diagnostics))
+        for path in list(self.files):
+            if path not in current:
+                del self.files[path]
+                changes.append((path, None))
+        return changes
+
+    def watch(self, interval: float = 0.5) -> Iterator[Tuple[str, Optional[Diagnostics]]]:
+        while True:
+            yield from self.scan()
+            time.sleep(interval)
+
+
+def _format(path: str, diagnostics: Optional[Diagnostics]) -> str:
+    if diagnostics is None:
+        return f"{path}: удалён"
+    if not diagnostics:
+        return f"{path}: ✅ успешно"
+    return "\n".join(
+        f"{path}: [строка {d['line']}] {d['kind'] + ': ' if d['kind'] else ''}{d['message']}" for d in diagnostics
+    )
+
+
+if __name__ == "__main__":
+    args = argparse.ArgumentParser(description="Повторный анализ изменённых программ модельного языка")
+    args.add_argument('root', help="каталог с исходниками")
+    args.add_argument('--pattern', default='*.txt')
+    args.add_argument('--interval', type=float, default=0.5, help="период опроса, с")
+    options = args.parse_args()
+    try:
+        for path, diagnostics in Watcher(options.root, options.pattern).watch(options.interval):
+            print(_format(path, diagnostics), flush=True)
+    except KeyboardInterrupt:
+        pass
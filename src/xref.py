@@ -0,0 +1,136 @@
+import json
+from array import array
+from typing import Dict, List, Optional, Sequence, Tuple
+from parser import ParseListener
+from tokens import Token, TokenType
+
+# Перекрёстные ссылки идентификаторов: объявление, чтения и записи.
+# Собираются из событий Parser; столбец берётся из потока токенов лексера —
+# события приходят в порядке следования идентификаторов в потоке.
+# После разбора вхождения сгруппированы по идентификатору в плоских массивах
+# (смещения по номеру TI), поэтому запрос — O(1) плюс число результатов.
+
+DECLARATION = 0
+READ = 1
+WRITE = 2
+
+KINDS = {
+    DECLARATION: 'declaration',
+    READ: 'read',
+    WRITE: 'write',
+}
+
+
+class XrefIndex(ParseListener):
+    def __init__(self, tokens: Sequence[Token], TI: Optional[Sequence[str]] = None):
+        self.tokens = tokens
+        self.cursor = 0
+        self.names: List[str] = list(TI or [])
+        self.ids: Dict[str, int] = {name: i for i, name in enumerate(self.names)}
+        # Вхождения в порядке разбора
+        self._ident = array('I')
+        self._kind = array('B')
+        self._line = array('I')
+        self._col = array('I')
+        # Сгруппированные вхождения, заполняются в finish()
+        self.offsets: Optional[array] = None
+        self.kinds = array('B')
+        self.lines = array('I')
+        self.cols = array('I')
+
+    def _add(self, name: str, kind: int, line: int):
+        col = 0
+        while self.cursor < len(self.tokens):
+            token = self.tokens[self.cursor]
+            self.cursor += 1
+            if token.type == TokenType.IDENTIFIER and token.value == name:
+                line, col = token.line, token.col
+                break
+        id = self.ids.get(name)
+        if id is None:
+            id = self.ids[name] = len(self.names)
+            self.names.append(name)
+        self._ident.append(id)
+        self._kind.append(kind)
+        self._line.append(line)
+        self._col.append(col)
+        self.offsets = None
+
+    # События Parser
+    def declaration(self, names: List[str], type: str, line: int):
+        for name in names:
+            self._add(name, DECLARATION, line)
+
+    def target(self, name: str, type: str, line: int):
+        self._add(name, WRITE, line)
+
+    def operand(self, kind: str, value: str, type: str, line: int):
+        if kind == 'identifier':
+            self._add(value, READ, line)
+
+    def end_program(self):
+        self.finish()
+
+    def finish(self):
+        # Устойчивая сортировка подсчётом по номеру идентификатора
+        counts = [0] * (len(self.names) + 1)
+        for id in self._ident:
+            counts[id + 1] += 1
+        for i in range(len(self.names)):
+            counts[i + 1] += counts[i]
+        self.offsets = array('I', counts)
+
+        size = len(self._ident)
+        self.kinds = array('B', bytes(size))
+        self.lines = array('I', bytes(4 * size))
+        self.cols = array('I', bytes(4 * size))
+        fill = counts[:-1]
+        for i, id in enumerate(self._ident):
+            at = fill[id]
+            fill[id] += 1
+            self.kinds[at] = self._kind[i]
+            self.lines[at] = self._line[i]
+            self.cols[at] = self._col[i]
+
+    def _range(self, name: str) -> range:
+        if self.offsets is None:
+            self.finish()
+        id = self.ids.get(name)
+        if id is None:
+            return range(0)
+        return range(self.offsets[id], self.offsets[id + 1])
+
+    def usages(self, name: str, kind: Optional[int] = None) -> List[Tuple[int, int, int]]:
+        # [(вид, строка, столбец)] в порядке появления в программе
+        return [
+            (self.kinds[i], self.lines[i], self.cols[i])
+            for i in self._range(name) if kind is None or self.kinds[i] == kind
+        ]
+
+    def declaration_of(self, name: str) -> Optional[Tuple[int, int]]:
+        for i in self._range(name):
+            if self.kinds[i] == DECLARATION:
+                return self.lines[i], self.cols[i]
+        return None
+
+    def reads(self, name: str) -> List[Tuple[int, int]]:
+        return [(line, col) for _, line, col in self.usages(name, READ)]
+
+    def writes(self, name: str) -> List[Tuple[int, int]]:
+        return [(line, col) for _, line, col in self.usages(name, WRITE)]
+
+    def to_dict(self) -> Dict[str, Dict[str, object]]:
+        result = {}
+        for name in self.names:
+            entry = {'declaration': None, 'reads': [], 'writes': []}
+            for kind, line, col in self.usages(name):
+                if kind == DECLARATION:
+                    entry['declaration'] = [line, col]
+                else:
+                    entry[KINDS[kind] + 's'].append([line, col])
+            result[name] = entry
+        return result
+
+    def save(self, path: str):
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(self.to_dict(), f, ensure_ascii=False, indent=2)